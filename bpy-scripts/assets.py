@@ -0,0 +1,40 @@
+# Asset roster shared by the build tools
+# Plain Python (no bpy) so it can be imported both inside and outside Blender
+import os
+from collections import namedtuple
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSET_DIR = os.path.join(os.path.dirname(SCRIPTS_DIR), 'Asset1')
+
+# module: builder script in bpy-scripts/, builder: its build_*() function,
+# fbx: output file name inside Asset1/, kind: 'tower' or 'enemy' (picks the LOD ratios)
+Asset = namedtuple('Asset', ['name', 'module', 'builder', 'fbx', 'kind'])
+
+ASSETS = {a.name: a for a in [
+    Asset('keris', 'keris_terbang', 'build_keris', 'keris.fbx', 'tower'),
+    Asset('tombak', 'tombak_keraton', 'build_tombak', 'tombak.fbx', 'tower'),
+    Asset('obor', 'obor_penjaga', 'build_obor', 'obor.fbx', 'tower'),
+    Asset('gamelan', 'gamelan_spirit', 'build_gamelan', 'gamelan.fbx', 'tower'),
+    Asset('payung', 'payung_keraton', 'build_payung', 'payung.fbx', 'tower'),
+    Asset('genderuwo', 'genderuwo', 'build_genderuwo', 'genderuwo.fbx', 'enemy'),
+    Asset('tuyul', 'tuyul', 'create_tuyul', 'tuyul.fbx', 'enemy'),
+    Asset('kuntilanak', 'kuntilanak', 'build_kuntilanak', 'kuntilanak.fbx', 'enemy'),
+]}
+
+
+# Tessellation profiles of common_utils.QUALITY_PROFILES; exports are built at 'game'
+QUALITIES = ('draft', 'preview', 'game', 'hero')
+EXPORT_QUALITY = 'game'
+
+# export_prep.export_asset() options by preset. 'plain' is what main(filepath_fbx) writes
+# on its own (fast, used by watch.py and build_client.py); 'release' turns on the opt-in
+# passes for the Roblox import (build_all.py's default).
+EXPORT_PRESETS = {
+    'plain': {},
+    'release': {'merge': True, 'cull': True, 'collision': 'HULL', 'lods': True},
+}
+EXPORT_PRESET = 'release'
+
+
+def fbx_path(name, out_dir=None):
+    return os.path.join(out_dir or ASSET_DIR, ASSETS[name].fbx)
@@ -0,0 +1,53 @@
+# Benchmark: bpy.ops primitives vs. data-API primitives, per asset
+# Run inside Blender:
+#   blender --background --factory-startup --python bpy-scripts/bench_primitives.py -- [asset ...] [--repeat 5]
+# Every builder is timed with common_utils.PRIMITIVE_BACKEND = 'OPS' and = 'DATA'.
+import argparse
+import importlib
+import os
+import sys
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import common_utils
+from assets import ASSETS
+
+
+def time_build(name, backend, repeat):
+    """Best-of-`repeat` wall time of the asset's build_*() with the given backend."""
+    asset = ASSETS[name]
+    module = importlib.import_module(asset.module)
+    build = getattr(module, asset.builder)
+    common_utils.PRIMITIVE_BACKEND = backend
+    best = float('inf')
+    try:
+        for _ in range(repeat):
+            with common_utils.build_session():
+                start = time.perf_counter()
+                build()
+                best = min(best, time.perf_counter() - start)
+    finally:
+        common_utils.PRIMITIVE_BACKEND = 'DATA'
+    return best
+
+
+def main():
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    parser = argparse.ArgumentParser(prog='bench_primitives.py')
+    parser.add_argument('assets', nargs='*', metavar='asset')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+    names = args.assets or list(ASSETS)
+
+    print('%-12s %10s %10s %8s' % ('asset', 'ops (ms)', 'data (ms)', 'speedup'))
+    for name in names:
+        ops = time_build(name, 'OPS', args.repeat)
+        data = time_build(name, 'DATA', args.repeat)
+        print('%-12s %10.1f %10.1f %7.1fx' % (name, ops * 1000, data * 1000, ops / data))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+# Parallel headless builder for every asset in bpy-scripts/
+# Run with a normal Python interpreter (not inside Blender):
+#   python bpy-scripts/build_all.py                 # whole roster
+#   python bpy-scripts/build_all.py keris tuyul -j 2
+# Each asset is built by its own `blender --background` process (build_worker.py).
+# Assets whose sources, options and Blender version are unchanged since the last
+# export are skipped (build_cache.py); use --force to rebuild anyway.
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from assets import ASSETS, ASSET_DIR, EXPORT_PRESET, EXPORT_PRESETS, EXPORT_QUALITY, QUALITIES, SCRIPTS_DIR, fbx_path
+from build_cache import cached_build
+
+WORKER = os.path.join(SCRIPTS_DIR, 'build_worker.py')
+
+
+def blender_command(blender, name, filepath_fbx, quality=EXPORT_QUALITY, preset=EXPORT_PRESET):
+    return [
+        blender, '--background', '--factory-startup',
+        '--python-exit-code', '1',
+        '--python', WORKER,
+        '--', name, filepath_fbx, '--quality', quality, '--preset', preset,
+    ]
+
+
+def blender_version(blender):
+    """Version from `blender --version` in bpy.app.version_string form, e.g. '4.1.1'."""
+    out = subprocess.run([blender, '--version'], stdout=subprocess.PIPE,
+                         stderr=subprocess.DEVNULL, universal_newlines=True).stdout.strip()
+    if not out:
+        return 'unknown'
+    first = out.splitlines()[0]
+    return first[len('Blender '):] if first.startswith('Blender ') else first
+
+
+def build_one(blender, name, out_dir, version=None, quality=EXPORT_QUALITY, preset=EXPORT_PRESET):
+    """Build one asset; with `version` set, skip it when its cache key is current."""
+    start = time.perf_counter()
+    filepath_fbx = fbx_path(name, out_dir)
+    output = []
+
+    def build():
+        proc = subprocess.run(
+            blender_command(blender, name, filepath_fbx, quality, preset),
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            universal_newlines=True)
+        output.append(proc.stdout)
+        return proc.returncode == 0
+
+    if version is None:
+        status = 'built' if build() else 'failed'
+    else:
+        status = cached_build(name, filepath_fbx, version, build,
+                              options={'quality': quality, 'export': EXPORT_PRESETS[preset]})
+    return name, status, time.perf_counter() - start, ''.join(output)
+
+
+def build_all(names, blender='blender', jobs=None, out_dir=None, verbose=False, force=False,
+              quality=EXPORT_QUALITY, preset=EXPORT_PRESET):
+    """Build `names` in a pool of Blender processes; returns {name: 'built'|'hit'|'failed'}."""
+    out_dir = out_dir or ASSET_DIR
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(names)))
+    version = None if force else blender_version(blender)
+    results = {}
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(build_one, blender, name, out_dir, version, quality, preset) for name in names]
+        for future in as_completed(futures):
+            name, status, seconds, output = future.result()
+            results[name] = status
+            label = {'built': 'ok', 'hit': 'cached', 'failed': 'FAILED'}[status]
+            print('%-12s %6.2fs  %s' % (name, seconds, label))
+            if verbose or status == 'failed':
+                print(output)
+    print('%d asset(s) in %.2fs with %d worker(s)' % (len(names), time.perf_counter() - start, jobs))
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Build bpy-scripts assets headlessly in parallel.')
+    parser.add_argument('assets', nargs='*', metavar='asset',
+                        help='assets to build (default: all of %s)' % ', '.join(sorted(ASSETS)))
+    parser.add_argument('--blender', default=os.environ.get('BLENDER', 'blender'),
+                        help='Blender executable (default: $BLENDER or blender)')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='worker processes (default: CPU count)')
+    parser.add_argument('-o', '--out', default=ASSET_DIR, help='output directory (default: Asset1/)')
+    parser.add_argument('-q', '--quality', choices=QUALITIES, default=EXPORT_QUALITY,
+                        help='tessellation profile (default: %(default)s)')
+    parser.add_argument('-p', '--preset', choices=sorted(EXPORT_PRESETS), default=EXPORT_PRESET,
+                        help='export passes, see assets.EXPORT_PRESETS (default: %(default)s)')
+    parser.add_argument('-f', '--force', action='store_true', help='ignore the build cache')
+    parser.add_argument('-v', '--verbose', action='store_true', help='print Blender output')
+    args = parser.parse_args(argv)
+    unknown = sorted(set(args.assets) - set(ASSETS))
+    if unknown:
+        parser.error('unknown asset(s): %s' % ', '.join(unknown))
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    names = args.assets or list(ASSETS)
+    results = build_all(names, blender=args.blender, jobs=args.jobs, out_dir=args.out,
+                        verbose=args.verbose, force=args.force, quality=args.quality,
+                        preset=args.preset)
+    return 0 if 'failed' not in results.values() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
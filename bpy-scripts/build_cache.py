@@ -0,0 +1,115 @@
+# Content-addressed build cache for the asset exports
+# Plain Python (no bpy). The key of an asset is a hash of:
+#   - the builder script and every bpy-scripts module it imports (common_utils.py and
+#     export_prep.py, which hold export_fbx(), the export passes and their parameters)
+#   - the asset's spec, specs/<name>.json, if it has one
+#   - library.blend (shared materials/rigs, see make_library.py), if it exists
+#   - budgets.json, the triangle/vertex limits export_prep.export_asset() enforces
+#   - the build/export options passed to main()
+#   - the Blender version
+# The key is recorded next to the output as `<name>.fbx.buildkey`; when it matches,
+# the rebuild is skipped.
+import ast
+import hashlib
+import json
+import os
+
+from assets import ASSETS, SCRIPTS_DIR
+
+KEY_SUFFIX = '.buildkey'
+LIBRARY_PATH = os.path.join(SCRIPTS_DIR, 'library.blend')
+BUDGETS_PATH = os.path.join(SCRIPTS_DIR, 'budgets.json')
+
+
+def local_imports(module):
+    """Names of bpy-scripts modules imported by `module` (directly)."""
+    with open(os.path.join(SCRIPTS_DIR, module + '.py'), 'rb') as f:
+        tree = ast.parse(f.read())
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module)
+    return {n for n in names if os.path.isfile(os.path.join(SCRIPTS_DIR, n + '.py'))}
+
+
+def dependency_order(module):
+    """`module` and its local imports, recursively, each listed after the modules it imports."""
+    order = []
+
+    def visit(name, stack):
+        if name in order or name in stack:
+            return
+        for dep in sorted(local_imports(name)):
+            visit(dep, stack | {name})
+        order.append(name)
+
+    visit(module, frozenset())
+    return order
+
+
+def dependencies(module):
+    """Source files `module` is built from: itself plus its local imports, recursively."""
+    return sorted(os.path.join(SCRIPTS_DIR, name + '.py') for name in dependency_order(module))
+
+
+def spec_path(name):
+    return os.path.join(SCRIPTS_DIR, 'specs', name + '.json')
+
+
+def sources(name):
+    """Every file the output of asset `name` is built from."""
+    paths = dependencies(ASSETS[name].module)
+    for path in (spec_path(name), LIBRARY_PATH, BUDGETS_PATH):
+        if os.path.isfile(path):
+            paths.append(path)
+    return paths
+
+
+def build_key(name, blender_version, options=None):
+    digest = hashlib.sha256()
+    for path in sources(name):
+        digest.update(os.path.basename(path).encode())
+        with open(path, 'rb') as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    digest.update(json.dumps(options or {}, sort_keys=True).encode())
+    digest.update(str(blender_version).encode())
+    return digest.hexdigest()
+
+
+def key_path(filepath_fbx):
+    return filepath_fbx + KEY_SUFFIX
+
+
+def recorded_key(filepath_fbx):
+    try:
+        with open(key_path(filepath_fbx)) as f:
+            return json.load(f).get('key')
+    except (OSError, ValueError):
+        return None
+
+
+def is_fresh(filepath_fbx, key):
+    return os.path.isfile(filepath_fbx) and recorded_key(filepath_fbx) == key
+
+
+def record_key(filepath_fbx, name, key):
+    with open(key_path(filepath_fbx), 'w') as f:
+        json.dump({'asset': name, 'key': key}, f, indent=2)
+        f.write('\n')
+
+
+def cached_build(name, filepath_fbx, blender_version, build, options=None):
+    """Call `build()` unless the recorded key for `filepath_fbx` is current.
+
+    `build` returns True on success; only successful builds record a key.
+    Returns 'hit', 'built' or 'failed'.
+    """
+    key = build_key(name, blender_version, options)
+    if is_fresh(filepath_fbx, key):
+        return 'hit'
+    if not build():
+        return 'failed'
+    record_key(filepath_fbx, name, key)
+    return 'built'
@@ -0,0 +1,124 @@
+# Client for the persistent Blender build server (build_worker.py --serve)
+# Run with a normal Python interpreter (not inside Blender):
+#   python bpy-scripts/build_client.py obor        # Enter = rebuild obor, q = quit
+#   python bpy-scripts/build_client.py obor --fbx   # also export to Asset1/obor.fbx
+#   python bpy-scripts/build_client.py tuyul --quality draft   # coarse, near-instant layout builds
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+
+from assets import ASSETS, EXPORT_PRESETS, EXPORT_QUALITY, QUALITIES, SCRIPTS_DIR, fbx_path
+from build_cache import build_key, key_path, record_key
+
+WORKER = os.path.join(SCRIPTS_DIR, 'build_worker.py')
+
+
+class BuildServer:
+    """A long-lived `blender --background` process that runs build/export jobs."""
+
+    def __init__(self, blender='blender'):
+        self.proc = subprocess.Popen(
+            [blender, '--background', '--factory-startup', '--python', WORKER, '--', '--serve'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, universal_newlines=True, bufsize=1)
+        self._ids = itertools.count(1)
+        ready = self._read_reply()
+        self.blender_version = ready.get('blender')
+
+    def _read_reply(self):
+        # Blender writes its own log lines to stdout as well; replies are the JSON objects
+        for line in self.proc.stdout:
+            line = line.strip()
+            if line.startswith('{'):
+                try:
+                    return json.loads(line)
+                except ValueError:
+                    pass
+        raise RuntimeError('Blender build server exited (code %s)' % self.proc.wait())
+
+    def submit(self, job):
+        job = dict(job, id=next(self._ids))
+        self.proc.stdin.write(json.dumps(job) + '\n')
+        self.proc.stdin.flush()
+        while True:
+            reply = self._read_reply()
+            if reply.get('id') == job['id']:
+                return reply
+
+    def build(self, asset, filepath_fbx=None, quality=EXPORT_QUALITY, preset='plain'):
+        return self.submit({'op': 'build', 'asset': asset, 'fbx': filepath_fbx, 'quality': quality,
+                            'export': EXPORT_PRESETS[preset]})
+
+    def close(self):
+        if self.proc.poll() is None:
+            self.submit({'op': 'quit'})
+            self.proc.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def format_reply(reply):
+    if not reply['ok']:
+        return '%s FAILED: %s' % (reply.get('asset'), reply.get('error'))
+    timings = ', '.join('%s %.3fs' % item for item in reply.get('timings', {}).items())
+    line = '%s ok in %.3fs (%s)' % (reply.get('asset'), reply['seconds'], timings)
+    if 'materials' in reply:
+        line += ' materials: %(hit)d reused, %(linked)d linked, %(miss)d new' % reply['materials']
+    report = reply.get('report', {})
+    if 'dedupe' in report:
+        line += ' meshes: %(meshes_before)d -> %(meshes_after)d (%(bytes_saved)d bytes saved)' % report['dedupe']
+    if 'caps' in report:
+        line += ' export caps: %(triangles_before)d -> %(triangles_after)d triangles' % report['caps']
+    if 'merge' in report:
+        line += ' draw calls: %(draw_calls_before)d -> %(draw_calls_after)d' % report['merge']
+    if 'consolidate' in report:
+        line += ' consolidated: %(triangles)d triangles' % report['consolidate']
+    if 'cull' in report:
+        line += ' culled: %(faces_removed)d/%(faces_before)d faces' % report['cull']
+    if report.get('split', {}).get('split'):
+        line += ' split: %s into %d chunks' % (', '.join(report['split']['split']), report['split']['chunks'])
+    if 'collision' in report:
+        line += ' collision: %(hulls)d pieces, %(triangles)d triangles' % report['collision']
+    if 'budget' in report:
+        line += ' triangles: %d/%d' % (report['budget']['triangles'], report['budget']['limits'].get('triangles', 0))
+    if 'lod' in report:
+        line += ' LOD triangles: %s' % ' / '.join(str(n) for n in report['lod']['triangles'])
+    return line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Rebuild an asset repeatedly in one Blender process.')
+    parser.add_argument('asset', choices=sorted(ASSETS))
+    parser.add_argument('--fbx', action='store_true', help='export to Asset1/ after each build')
+    parser.add_argument('--quality', choices=QUALITIES, default=EXPORT_QUALITY,
+                        help='tessellation profile, e.g. draft for layout work (default: %(default)s)')
+    parser.add_argument('--preset', choices=sorted(EXPORT_PRESETS), default='plain',
+                        help='export passes with --fbx (default: %(default)s)')
+    parser.add_argument('--blender', default=os.environ.get('BLENDER', 'blender'))
+    args = parser.parse_args(argv)
+    filepath_fbx = fbx_path(args.asset) if args.fbx else None
+    with BuildServer(args.blender) as server:
+        print('Blender %s ready. Enter = rebuild %s, q = quit.' % (server.blender_version, args.asset))
+        while True:
+            if filepath_fbx and os.path.isfile(key_path(filepath_fbx)):
+                # a failed build may leave a partial FBX behind the old key
+                os.remove(key_path(filepath_fbx))
+            reply = server.build(args.asset, filepath_fbx, args.quality, args.preset)
+            print(format_reply(reply))
+            if filepath_fbx and reply['ok']:
+                # the FBX now holds this quality and preset: build_all.py must not take it for its own
+                options = {'quality': args.quality, 'export': EXPORT_PRESETS[args.preset]}
+                record_key(filepath_fbx, args.asset, build_key(args.asset, server.blender_version, options))
+            if input().strip().lower() in ('q', 'quit'):
+                break
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,222 @@
+# Headless build worker, run inside Blender.
+#
+# One-shot (used by build_all.py):
+#   blender --background --factory-startup --python build_worker.py -- <asset> <filepath_fbx> [--preset release]
+#
+# Persistent server: pays Blender startup once, then takes jobs as JSON lines on
+# stdin (or on a local TCP socket with --port) and answers one JSON line per job:
+#   blender --background --factory-startup --python build_worker.py -- --serve [--port 8765]
+#   {"op": "build", "asset": "obor", "fbx": "/tmp/obor.fbx"}
+#   {"op": "build", "asset": "payung", "array_mode": "GEONODES"}   (see common_utils.ARRAY_MODE)
+#   {"op": "build", "asset": "tuyul", "quality": "draft"}            (see common_utils.QUALITY, default game)
+#   {"op": "build", "asset": "payung", "fbx": "/tmp/payung.fbx", "export": {"merge": true}}  (see assets.EXPORT_PRESETS)
+#   {"op": "export", "fbx": "/tmp/scene.fbx"}
+#   {"op": "ping"} / {"op": "quit"}
+# Builds run the builder's main(filepath_fbx, **export), the same path as the one-shot
+# mode and the Blender text editor, so exports go through export_prep.export_asset() with
+# the job's "export" options as keyword arguments; its report comes back as "report".
+# Builder modules are reloaded when their source (or common_utils.py) changes on disk.
+import argparse
+import contextlib
+import importlib
+import itertools
+import json
+import os
+import socket
+import sys
+import time
+import traceback
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import bpy
+
+from assets import ASSETS, EXPORT_PRESET, EXPORT_PRESETS, EXPORT_QUALITY, QUALITIES
+from build_cache import dependency_order, local_imports
+
+# module name -> (source mtime, load generation) of the copy in sys.modules
+_loaded = {}
+_generation = itertools.count(1)
+
+
+def script_args():
+    # Blender ignores everything after '--' and leaves it to the script
+    if '--' in sys.argv:
+        return sys.argv[sys.argv.index('--') + 1:]
+    return []
+
+
+def _mtime(name):
+    return os.path.getmtime(os.path.join(SCRIPTS_DIR, name + '.py'))
+
+
+def load_module(name):
+    """Import a bpy-scripts module, reloading whatever changed on disk since the last job.
+
+    A module is also reloaded when one of its local imports was, since builders bind
+    common_utils names at import time.
+    """
+    for module in dependency_order(name):
+        mtime = _mtime(module)
+        deps_generation = max((_loaded[dep][1] for dep in local_imports(module)), default=0)
+        entry = _loaded.get(module)
+        if module in sys.modules and entry and entry[0] == mtime and entry[1] >= deps_generation:
+            continue
+        if module in sys.modules:
+            importlib.reload(sys.modules[module])
+        else:
+            importlib.import_module(module)
+        _loaded[module] = (mtime, next(_generation))
+    return sys.modules[name]
+
+
+@contextlib.contextmanager
+def build_settings(quality, array_mode=None):
+    """Set common_utils.QUALITY (and ARRAY_MODE, when given) for one build, restoring them after."""
+    common_utils = sys.modules['common_utils']
+    saved = common_utils.QUALITY, common_utils.ARRAY_MODE
+    common_utils.QUALITY = quality
+    if array_mode:
+        common_utils.ARRAY_MODE = array_mode
+    try:
+        yield
+    finally:
+        common_utils.QUALITY, common_utils.ARRAY_MODE = saved
+
+
+def run_asset(name, filepath_fbx, quality=EXPORT_QUALITY, array_mode=None, **export_options):
+    """Build (and export) asset `name` through its main(), as the Blender text editor would.
+
+    One-shot builds and server jobs both come here, so an FBX is the same whichever
+    wrote its .buildkey. Returns the seconds main() took.
+    """
+    module = load_module(ASSETS[name].module)
+    with build_settings(quality, array_mode):
+        start = time.perf_counter()
+        module.main(filepath_fbx=filepath_fbx, **export_options)
+        return time.perf_counter() - start
+
+
+def build_job(job):
+    timings = {}
+    start = time.perf_counter()
+    load_module(ASSETS[job['asset']].module)
+    timings['load'] = time.perf_counter() - start
+
+    common_utils = sys.modules['common_utils']
+    common_utils.reset_material_stats()
+    # main() resets the scene (its build_session()), builds and, with an FBX path,
+    # exports: 'build' is all of it but that reset
+    seconds = run_asset(job['asset'], job.get('fbx'), job.get('quality', EXPORT_QUALITY),
+                        job.get('array_mode'), **job.get('export', {}))
+    timings['reset'] = common_utils.reset_seconds()
+    timings['build'] = seconds - timings['reset']
+    reply = {'timings': timings, 'materials': common_utils.material_stats()}
+    if job.get('fbx'):
+        with open(load_module('export_prep').report_path(job['fbx'])) as f:
+            reply['report'] = json.load(f)
+    return reply
+
+
+def export_job(job):
+    start = time.perf_counter()
+    options = dict(job.get('export', {}))
+    if job.get('asset'):
+        options.setdefault('kind', ASSETS[job['asset']].kind)
+    report = load_module('export_prep').export_asset(job['fbx'], **options)
+    return {'timings': {'export': time.perf_counter() - start}, 'report': report}
+
+
+JOBS = {
+    'build': build_job,
+    'export': export_job,
+    'ping': lambda job: {},
+}
+
+
+def handle(job):
+    """Run one job dict and return the JSON-serialisable reply."""
+    reply = {'id': job.get('id'), 'op': job.get('op', 'build'), 'asset': job.get('asset')}
+    start = time.perf_counter()
+    try:
+        # keep stdout for replies; builders' progress prints go to stderr
+        with contextlib.redirect_stdout(sys.stderr):
+            reply.update(JOBS[reply['op']](job))
+        reply['ok'] = True
+    except Exception as exc:
+        reply['ok'] = False
+        reply['error'] = '%s: %s' % (type(exc).__name__, exc)
+        traceback.print_exc()
+    reply['seconds'] = time.perf_counter() - start
+    return reply
+
+
+def serve_lines(lines, write):
+    write({'ready': True, 'blender': bpy.app.version_string})
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            job = json.loads(line)
+        except ValueError as exc:
+            write({'ok': False, 'error': 'invalid JSON: %s' % exc})
+            continue
+        if job.get('op') == 'quit':
+            write({'id': job.get('id'), 'op': 'quit', 'ok': True})
+            return True
+        write(handle(job))
+    return False
+
+
+def serve_stdin():
+    def write(reply):
+        sys.stdout.write(json.dumps(reply) + '\n')
+        sys.stdout.flush()
+    serve_lines(sys.stdin, write)
+
+
+def serve_socket(port):
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind(('127.0.0.1', port))
+    server.listen(1)
+    print('[build_worker] serving on 127.0.0.1:%d' % port)
+    with server:
+        while True:
+            conn, _ = server.accept()
+            with conn, conn.makefile('r') as rfile, conn.makefile('w') as wfile:
+                def write(reply):
+                    wfile.write(json.dumps(reply) + '\n')
+                    wfile.flush()
+                if serve_lines(rfile, write):
+                    return
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='build_worker.py')
+    parser.add_argument('asset', nargs='?', choices=sorted(ASSETS))
+    parser.add_argument('filepath_fbx', nargs='?')
+    parser.add_argument('--quality', choices=QUALITIES, default=EXPORT_QUALITY, help='tessellation profile')
+    parser.add_argument('--preset', choices=sorted(EXPORT_PRESETS), default=EXPORT_PRESET,
+                        help='export passes (assets.EXPORT_PRESETS)')
+    parser.add_argument('--serve', action='store_true', help='run as a persistent job server')
+    parser.add_argument('--port', type=int, default=None, help='serve on a local TCP port instead of stdin')
+    args = parser.parse_args(script_args())
+    if args.serve:
+        if args.port:
+            serve_socket(args.port)
+        else:
+            serve_stdin()
+        return
+    if not (args.asset and args.filepath_fbx):
+        parser.error('need <asset> <filepath_fbx> or --serve')
+    seconds = run_asset(args.asset, args.filepath_fbx, args.quality, **EXPORT_PRESETS[args.preset])
+    print('[build_worker] %s built in %.2fs -> %s' % (args.asset, seconds, args.filepath_fbx))
+    print('[build_worker] materials: %(hit)d reused, %(linked)d linked, %(miss)d new' % sys.modules['common_utils'].material_stats())
+
+
+if __name__ == '__main__':
+    main()
@@ -1,17 +1,125 @@
 # Utility helpers for Blender (bpy) scripting
 # Run inside Blender's Python environment
+import json
+import os
+import time
 import bpy
-from mathutils import Vector
+import bmesh
+import numpy as np
+from contextlib import contextmanager
+from math import cos, pi, radians, sin
+from mathutils import Euler, Matrix, Vector
+
+# How add_cube()/add_cylinder()/add_cone()/add_uv_sphere()/add_torus() create parts:
+# 'DATA' builds the mesh with bmesh and links it through bpy.data, with no operator
+# dispatch, undo push, selection change or view-layer update per part;
+# 'OPS' goes through bpy.ops.mesh.primitive_*_add (kept for bench_primitives.py).
+PRIMITIVE_BACKEND = 'DATA'
+
+# Tessellation profile every builder reads: add_*() scale their segment counts by
+# 'segments' and add_subsurf() caps subdivision levels at 'subsurf' (None: as authored).
+# 'draft' is for layout work, 'game' for exports that have to fit budgets.json.
+QUALITY_PROFILES = {
+    'draft': {'segments': 0.25, 'subsurf': 0},
+    'preview': {'segments': 0.5, 'subsurf': 1},
+    'game': {'segments': 0.75, 'subsurf': 1},
+    'hero': {'segments': 1.0, 'subsurf': None},
+}
+QUALITY = 'hero'
+# primitive parameters that count segments
+SEGMENT_PARAMS = ('vertices', 'segments', 'ring_count', 'major_segments', 'minor_segments')
+# counts at or below this are authored low-poly shapes (4-sided blades, 6-sided
+# bases) and are never touched; larger counts are scaled but not below it
+SEGMENT_SCALE_MIN = 12
+
+# Default mode of array_objects(): 'INSTANCES' (objects sharing one mesh), 'MERGED'
+# (one mesh) or 'GEONODES' (one point cloud instancing the part through a shared
+# Geometry Nodes group, realized only while exporting)
+ARRAY_MODE = 'INSTANCES'
+ARRAY_MODIFIER = 'KTD_Array'
+ARRAY_GROUP = 'KTD_InstanceOnPoints'
+REALIZE_MODIFIER = 'KTD_Realize'
+REALIZE_GROUP = 'KTD_RealizeInstances'
+
+# Declarative asset specs read by load_spec()
+SPECS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'specs')
+
+# Shared materials, studio rigs and node groups, generated by make_library.py and
+# linked on demand by from_library(); USE_LIBRARY = False builds everything locally
+LIBRARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'library.blend')
+USE_LIBRARY = True
+_library_mtime = None
+
+# Collection new parts are linked into while a build_batch() is active, and its asset name
+_batch_collection = None
+_batch_asset = None
+
+# Part registry: asset name -> {object: None} of the objects tagged by tag_part().
+# The tags are also stored on the objects as custom properties.
+ASSET_PROP = 'ktd_asset'
+PART_PROP = 'ktd_part'
+ROLE_PROP = 'ktd_role'
+LOD_PROP = 'ktd_lod'
+_parts = {}
+
+# bpy.data collections a build can add to; what the last build_session() created in
+# them is removed by the next reset_scene()
+SESSION_DATA = (
+    'objects', 'meshes', 'curves', 'materials', 'textures', 'images', 'node_groups',
+    'particles', 'lights', 'cameras', 'worlds', 'collections',
+)
+# (kept across importlib.reload(), e.g. by build_worker.py)
+_session_ids = globals().get('_session_ids', [])
+# how long the last reset_scene() took, see reset_seconds()
+_reset_stats = {'seconds': 0.0}
+
+# make_material() registry: look key -> material, plus lookup counts
+MATERIAL_KEY_PROP = 'ktd_material_key'
+_materials = {}
+_material_stats = {'hit': 0, 'linked': 0, 'miss': 0}
+
+
+def reset_seconds():
+    """Seconds the last reset_scene() took (e.g. the one build_session() starts with)."""
+    return _reset_stats['seconds']
+
+
+def _local_ids():
+    # datablocks linked from library.blend are shared and never removed
+    return {block for attr in SESSION_DATA for block in getattr(bpy.data, attr) if block.library is None}
+
+
+def _alive(block):
+    try:
+        block.name
+        return True
+    except ReferenceError:
+        return False
 
 
 def reset_scene():
-    bpy.ops.object.select_all(action='SELECT')
-    bpy.ops.object.delete(use_global=False)
-    for m in bpy.data.meshes:
-        bpy.data.meshes.remove(m)
-    for c in bpy.data.collections:
-        if c.name != 'Collection':
-            bpy.data.collections.remove(c)
+    """Remove everything the previous build_session() created, in one batch_remove().
+
+    Local objects still in the scene from outside a session (the startup cube, a
+    script run by hand) go too, with data only they used, as do local collections
+    other than 'Collection'. Linked studio rigs are unlinked from the scene but stay
+    loaded for the next link_rig().
+    """
+    start = time.perf_counter()
+    scene = bpy.context.scene
+    doomed = {block for block in _session_ids if _alive(block)}
+    _session_ids.clear()
+    for obj in scene.objects:
+        if obj.library is None and obj not in doomed:
+            doomed.add(obj)
+            if obj.data is not None and obj.data.library is None and obj.data.users == 1:
+                doomed.add(obj.data)
+    doomed.update(c for c in bpy.data.collections if c.library is None and c.name != 'Collection')
+    bpy.data.batch_remove(doomed)
+    _parts.clear()
+    for child in list(scene.collection.children):
+        if child.library is not None:
+            scene.collection.children.unlink(child)
     # Set render engine (try EEVEE_NEXT first for Blender 4.x, fallback to older versions)
     try:
         bpy.context.scene.render.engine = 'BLENDER_EEVEE_NEXT'
@@ -20,6 +128,58 @@ def reset_scene():
             bpy.context.scene.render.engine = 'BLENDER_EEVEE'
         except TypeError:
             bpy.context.scene.render.engine = 'CYCLES'
+    _reset_stats['seconds'] = time.perf_counter() - start
+
+
+def _linked_library():
+    for library in bpy.data.libraries:
+        if os.path.normcase(bpy.path.abspath(library.filepath)) == os.path.normcase(LIBRARY_PATH):
+            return library
+    return None
+
+
+def from_library(attr, name):
+    """Datablock `name` of bpy.data.<attr> (e.g. 'materials') linked from library.blend.
+
+    Linking is lazy: only requested datablocks are linked, once per session, and
+    the library is reloaded when make_library.py rewrote it. Returns None when the
+    library or the datablock does not exist, so callers can build it locally.
+    """
+    global _library_mtime
+    if not USE_LIBRARY or not os.path.isfile(LIBRARY_PATH):
+        return None
+    mtime = os.path.getmtime(LIBRARY_PATH)
+    library = _linked_library()
+    if library is not None:
+        if _library_mtime is not None and _library_mtime != mtime:
+            library.reload()
+        _library_mtime = mtime
+        for block in getattr(bpy.data, attr):
+            if block.library == library and block.name == name:
+                return block
+    with bpy.data.libraries.load(LIBRARY_PATH, link=True) as (data_from, data_to):
+        found = name in getattr(data_from, attr)
+        if found:
+            setattr(data_to, attr, [name])
+    _library_mtime = mtime
+    return getattr(data_to, attr)[0] if found else None
+
+
+def link_rig(name):
+    """Link the studio rig collection `name` (lights + camera) from library.blend into the scene.
+
+    Returns False when it is not available.
+    """
+    rig = from_library('collections', name)
+    if rig is None:
+        return False
+    scene = bpy.context.scene
+    if rig not in list(scene.collection.children):
+        scene.collection.children.link(rig)
+    cameras = [obj for obj in rig.all_objects if obj.type == 'CAMERA']
+    if cameras:
+        scene.camera = cameras[0]
+    return True
 
 
 def set_units_metric(scale_length=1.0):
@@ -28,8 +188,64 @@ def set_units_metric(scale_length=1.0):
     scene.unit_settings.scale_length = scale_length
 
 
+def _material_key(base_color, emission_strength, metallic, roughness):
+    values = tuple(base_color) + (metallic, roughness, emission_strength)
+    return ','.join('%.4f' % v for v in values)
+
+
+def _registered_material(key):
+    mat = _materials.get(key)
+    if mat is not None:
+        try:
+            mat.name
+            return mat
+        except ReferenceError:
+            # removed since (scene reset, file reload)
+            del _materials[key]
+    # materials from an earlier run of this module (e.g. before a reload)
+    for mat in bpy.data.materials:
+        if mat.get(MATERIAL_KEY_PROP) == key:
+            _materials[key] = mat
+            return mat
+    return None
+
+
+def material_stats():
+    """make_material() registry hits/misses since start (or the last reset_material_stats())."""
+    return dict(_material_stats, materials=len(_materials))
+
+
+def reset_material_stats():
+    _material_stats.update(hit=0, linked=0, miss=0)
+
+
 def make_material(name, base_color=(1, 1, 1, 1), emission_strength=0.0, metallic=0.0, roughness=0.5):
+    """Principled (+ emission) material, shared between identical looks.
+
+    Materials are registered by (base_color, metallic, roughness, emission_strength):
+    a repeated call, from the same or another asset, returns the existing material
+    under the name it was first created with instead of adding `name.001`.
+    """
+    key = _material_key(base_color, emission_strength, metallic, roughness)
+    mat = _registered_material(key)
+    if mat is not None:
+        _material_stats['hit'] += 1
+        return mat
+    mat = from_library('materials', name)
+    if mat is not None and mat.get(MATERIAL_KEY_PROP) == key:
+        _material_stats['linked'] += 1
+        _materials[key] = mat
+        return mat
+    _material_stats['miss'] += 1
+    mat = new_material(name, base_color, emission_strength, metallic, roughness)
+    _materials[key] = mat
+    return mat
+
+
+def new_material(name, base_color=(1, 1, 1, 1), emission_strength=0.0, metallic=0.0, roughness=0.5):
+    """Principled (+ emission) material `name`, always new (make_library.py's canonical copies)."""
     mat = bpy.data.materials.new(name)
+    mat[MATERIAL_KEY_PROP] = _material_key(base_color, emission_strength, metallic, roughness)
     mat.use_nodes = True
     nodes = mat.node_tree.nodes
     links = mat.node_tree.links
@@ -61,22 +277,794 @@ def assign_material(obj, mat):
         obj.data.materials[0] = mat
     else:
         obj.data.materials.append(mat)
+    # a GEONODES array shows its template's material
+    template = array_template(obj)
+    if template is not None:
+        assign_material(template, mat)
 
 
-def add_empty_at(name, location=(0, 0, 0)):
+def add_empty_at(name, location=(0, 0, 0), role='root'):
     empty = bpy.data.objects.new(name, None)
     empty.location = Vector(location)
-    bpy.context.collection.objects.link(empty)
-    return empty
-
-
-def export_fbx(filepath, apply_scale='FBX_SCALE_ALL', bake_space_transform=True):
-    bpy.ops.export_scene.fbx(
-        filepath=filepath,
-        use_selection=False,
-        apply_scale_options=apply_scale,
-        bake_space_transform=bake_space_transform,
-        object_types={'MESH', 'EMPTY'},
-        use_mesh_modifiers=True,
-        add_leaf_bones=False,
-        path_mode='AUTOMATIC')
+    (_batch_collection or bpy.context.collection).objects.link(empty)
+    return tag_part(empty, role)
+
+
+def tag_part(obj, role=None, asset=None, part=None, lod=None):
+    """Register `obj` as a part of `asset` (default: the active build_batch()).
+
+    `role` names what the part is for material assignment ('skin', 'teeth', ...),
+    `part` defaults to the object name and `lod` to LOD group 0. Parts made by
+    add_*() inside build_batch() are tagged automatically. Objects outside any
+    asset are returned untouched.
+    """
+    asset = asset or _batch_asset or obj.get(ASSET_PROP)
+    if asset is None:
+        return obj
+    obj[ASSET_PROP] = asset
+    obj[PART_PROP] = part or obj.get(PART_PROP) or obj.name
+    if role is not None:
+        obj[ROLE_PROP] = role
+    if lod is not None or LOD_PROP not in obj:
+        obj[LOD_PROP] = lod or 0
+    _parts.setdefault(asset, {})[obj] = None
+    return obj
+
+
+def _untag(obj):
+    registry = _parts.get(obj.get(ASSET_PROP))
+    if registry is not None:
+        registry.pop(obj, None)
+    for prop in (ASSET_PROP, PART_PROP, ROLE_PROP, LOD_PROP):
+        if prop in obj:
+            del obj[prop]
+
+
+def parts(asset, role=None, lod=None):
+    """Live objects tagged as parts of `asset`, optionally only one role and/or LOD group.
+
+    Costs O(parts of the asset), not O(objects in the file).
+    """
+    registry = _parts.get(asset)
+    if registry is None:
+        # tags from a saved .blend or from before a module reload
+        registry = _parts[asset] = {obj: None for obj in bpy.data.objects if obj.get(ASSET_PROP) == asset}
+    found = []
+    for obj in list(registry):
+        if not _alive(obj):
+            del registry[obj]
+        elif (role is None or obj.get(ROLE_PROP) == role) and (lod is None or obj.get(LOD_PROP) == lod):
+            found.append(obj)
+    return found
+
+
+def assign_role_materials(asset, materials):
+    """assign_material() to every mesh part of `asset` whose role is a key of {role: material}."""
+    for obj in parts(asset):
+        mat = materials.get(obj.get(ROLE_PROP))
+        if mat is not None and obj.type == 'MESH':
+            assign_material(obj, mat)
+
+
+def parent_parts(asset, root):
+    """Parent every unparented part of `asset` to `root` (keeping their transforms as local)."""
+    for obj in parts(asset):
+        if obj != root and obj.parent is None:
+            obj.parent = root
+
+
+def part_stats(asset):
+    """{role: {'objects', 'vertices', 'triangles'}} of the mesh parts of `asset` (base meshes)."""
+    stats = {}
+    for obj in parts(asset):
+        if obj.type != 'MESH':
+            continue
+        mesh = obj.data
+        loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+        mesh.polygons.foreach_get('loop_total', loop_totals)
+        entry = stats.setdefault(obj.get(ROLE_PROP), {'objects': 0, 'vertices': 0, 'triangles': 0})
+        entry['objects'] += 1
+        entry['vertices'] += len(mesh.vertices)
+        entry['triangles'] += int((loop_totals - 2).sum())
+    return stats
+
+
+@contextmanager
+def build_session(reset=True):
+    """Scope of one asset build, from scene reset to export.
+
+    Every datablock created inside is recorded, so the next reset_scene() removes
+    exactly those (materials, textures, particle settings, lights, cameras, ...)
+    while the built asset stays in the scene until then.
+    """
+    if reset:
+        reset_scene()
+    before = _local_ids()
+    try:
+        yield
+    finally:
+        _session_ids.extend(_local_ids() - before)
+
+
+@contextmanager
+def build_batch(name):
+    """Build an asset's parts into a collection that is not linked to the scene yet.
+
+    add_*() and add_empty_at() link into it and tag_part() their objects as parts
+    of asset `name`, so no depsgraph or view-layer update
+    runs per part, and global undo is off meanwhile. On exit the collection is
+    linked to the scene and the view layer is evaluated once. Works as a
+    decorator too: @build_batch("Keris").
+    """
+    global _batch_collection, _batch_asset
+    edit_prefs = bpy.context.preferences.edit
+    use_global_undo = edit_prefs.use_global_undo
+    collection = bpy.data.collections.new(name)
+    previous, previous_asset = _batch_collection, _batch_asset
+    _batch_collection, _batch_asset = collection, name
+    edit_prefs.use_global_undo = False
+    try:
+        yield collection
+    finally:
+        _batch_collection, _batch_asset = previous, previous_asset
+        edit_prefs.use_global_undo = use_global_undo
+    (previous.children if previous else bpy.context.scene.collection.children).link(collection)
+    bpy.context.view_layer.update()
+
+
+def shade_smooth(obj):
+    mesh = obj.data
+    mesh.polygons.foreach_set('use_smooth', [True] * len(mesh.polygons))
+    mesh.update()
+
+
+def _create_torus(bm, major_segments, minor_segments, major_radius, minor_radius, matrix=None):
+    uv_layer = bm.loops.layers.uv.active
+    matrix = matrix if matrix is not None else Matrix()
+    rings = []
+    for i in range(major_segments):
+        u = 2 * pi * i / major_segments
+        ring = []
+        for j in range(minor_segments):
+            v = 2 * pi * j / minor_segments
+            r = major_radius + minor_radius * cos(v)
+            ring.append(bm.verts.new(matrix @ Vector((r * cos(u), r * sin(u), minor_radius * sin(v)))))
+        rings.append(ring)
+    for i in range(major_segments):
+        a, b = rings[i], rings[(i + 1) % major_segments]
+        for j in range(minor_segments):
+            k = (j + 1) % minor_segments
+            face = bm.faces.new((a[j], b[j], b[k], a[k]))
+            if uv_layer is not None:
+                corners = ((i, j), (i + 1, j), (i + 1, j + 1), (i, j + 1))
+                for loop, (x, y) in zip(face.loops, corners):
+                    loop[uv_layer].uv = (x / major_segments, y / minor_segments)
+    return [v for ring in rings for v in ring]
+
+
+# Primitive geometry written into an existing bmesh, transformed by `matrix`;
+# each returns the new vertices. Shared by add_*() and the spec compiler.
+def _fill_cube(bm, matrix=None, size=2.0):
+    return bmesh.ops.create_cube(bm, size=size, matrix=matrix or Matrix(), calc_uvs=True)['verts']
+
+
+def _fill_cylinder(bm, matrix=None, vertices=32, radius=1.0, depth=2.0):
+    return _fill_cone(bm, matrix, vertices, radius, radius, depth)
+
+
+def _fill_cone(bm, matrix=None, vertices=32, radius1=1.0, radius2=0.0, depth=2.0):
+    return bmesh.ops.create_cone(
+        bm, cap_ends=True, cap_tris=False, segments=vertices, radius1=radius1, radius2=radius2,
+        depth=depth, matrix=matrix or Matrix(), calc_uvs=True)['verts']
+
+
+def _fill_uv_sphere(bm, matrix=None, segments=32, ring_count=16, radius=1.0):
+    return bmesh.ops.create_uvsphere(
+        bm, u_segments=segments, v_segments=ring_count, radius=radius, matrix=matrix or Matrix(),
+        calc_uvs=True)['verts']
+
+
+def _fill_torus(bm, matrix=None, major_segments=48, minor_segments=12, major_radius=1.0, minor_radius=0.25):
+    return _create_torus(bm, major_segments, minor_segments, major_radius, minor_radius, matrix)
+
+
+def tessellate(params):
+    """Primitive `params` with their segment counts scaled for the QUALITY profile."""
+    factor = QUALITY_PROFILES[QUALITY]['segments']
+    return {key: max(SEGMENT_SCALE_MIN, int(round(value * factor)))
+            if key in SEGMENT_PARAMS and value > SEGMENT_SCALE_MIN else value
+            for key, value in params.items()}
+
+
+def subsurf_levels(levels):
+    """`levels` capped by the QUALITY profile."""
+    cap = QUALITY_PROFILES[QUALITY]['subsurf']
+    return levels if cap is None else min(levels, cap)
+
+
+def add_subsurf(obj, levels=2, render_levels=None, name='Subdivision'):
+    """Add a SUBSURF modifier, both levels capped by the QUALITY profile."""
+    subsurf = obj.modifiers.new(name=name, type='SUBSURF')
+    subsurf.levels = subsurf_levels(levels)
+    subsurf.render_levels = subsurf_levels(levels if render_levels is None else render_levels)
+    return subsurf
+
+
+def _primitive(name, op, params, fill, location, rotation, scale, smooth, collection, role):
+    params = tessellate(params)
+    if PRIMITIVE_BACKEND == 'OPS':
+        op(location=location, **params)
+        obj = bpy.context.active_object
+        collection = collection or _batch_collection
+        if collection is not None and collection not in obj.users_collection:
+            for c in list(obj.users_collection):
+                c.objects.unlink(obj)
+            collection.objects.link(obj)
+    else:
+        bm = bmesh.new()
+        bm.loops.layers.uv.new('UVMap')
+        fill(bm, **params)
+        mesh = bpy.data.meshes.new(name)
+        bm.to_mesh(mesh)
+        bm.free()
+        obj = bpy.data.objects.new(name, mesh)
+        obj.location = location
+        (collection or _batch_collection or bpy.context.collection).objects.link(obj)
+    obj.name = name
+    obj.rotation_euler = rotation
+    obj.scale = scale
+    if smooth:
+        shade_smooth(obj)
+    return tag_part(obj, role)
+
+
+def add_cube(name='Cube', size=2.0, location=(0, 0, 0), rotation=(0, 0, 0), scale=(1, 1, 1),
+             smooth=False, collection=None, role=None):
+    return _primitive(
+        name, bpy.ops.mesh.primitive_cube_add, dict(size=size),
+        _fill_cube, location, rotation, scale, smooth, collection, role)
+
+
+def add_cylinder(name='Cylinder', vertices=32, radius=1.0, depth=2.0, location=(0, 0, 0),
+                 rotation=(0, 0, 0), scale=(1, 1, 1), smooth=False, collection=None, role=None):
+    return _primitive(
+        name, bpy.ops.mesh.primitive_cylinder_add, dict(vertices=vertices, radius=radius, depth=depth),
+        _fill_cylinder, location, rotation, scale, smooth, collection, role)
+
+
+def add_cone(name='Cone', vertices=32, radius1=1.0, radius2=0.0, depth=2.0, location=(0, 0, 0),
+             rotation=(0, 0, 0), scale=(1, 1, 1), smooth=False, collection=None, role=None):
+    return _primitive(
+        name, bpy.ops.mesh.primitive_cone_add,
+        dict(vertices=vertices, radius1=radius1, radius2=radius2, depth=depth),
+        _fill_cone, location, rotation, scale, smooth, collection, role)
+
+
+def add_uv_sphere(name='Sphere', segments=32, ring_count=16, radius=1.0, location=(0, 0, 0),
+                  rotation=(0, 0, 0), scale=(1, 1, 1), smooth=False, collection=None, role=None):
+    return _primitive(
+        name, bpy.ops.mesh.primitive_uv_sphere_add,
+        dict(segments=segments, ring_count=ring_count, radius=radius),
+        _fill_uv_sphere, location, rotation, scale, smooth, collection, role)
+
+
+def add_torus(name='Torus', major_segments=48, minor_segments=12, major_radius=1.0, minor_radius=0.25,
+              location=(0, 0, 0), rotation=(0, 0, 0), scale=(1, 1, 1), smooth=False, collection=None, role=None):
+    return _primitive(
+        name, bpy.ops.mesh.primitive_torus_add,
+        dict(major_segments=major_segments, minor_segments=minor_segments,
+             major_radius=major_radius, minor_radius=minor_radius),
+        _fill_torus, location, rotation, scale, smooth, collection, role)
+
+
+def world_matrix(obj):
+    """obj.matrix_world computed from loc/rot/scale and parents.
+
+    Unlike matrix_world this is valid for objects that were never evaluated,
+    e.g. parts built inside build_batch().
+    """
+    matrix = obj.matrix_basis.copy()
+    while obj.parent is not None:
+        matrix = world_matrix(obj.parent) @ obj.matrix_parent_inverse @ matrix
+        obj = obj.parent
+    return matrix
+
+
+@contextmanager
+def edit_bmesh(obj):
+    """Edit obj's mesh as a bmesh in object mode: no mode_set, no active object needed."""
+    bm = bmesh.new()
+    bm.from_mesh(obj.data)
+    try:
+        yield bm
+        bm.to_mesh(obj.data)
+        obj.data.update()
+    finally:
+        bm.free()
+
+
+def join_objects(objects, name=None):
+    """Merge the meshes of `objects` into the first one, like bpy.ops.object.join().
+
+    Works on mesh data directly, without selection or an active object. Transforms
+    are baked relative to the first object and material slots are merged; the other
+    objects (and meshes nobody else uses) are removed.
+    """
+    target = objects[0]
+    to_target = world_matrix(target).inverted()
+    materials = target.data.materials
+    bm = bmesh.new()
+    bm.from_mesh(target.data)
+    for other in objects[1:]:
+        mesh = other.data.copy()
+        mesh.transform(to_target @ world_matrix(other))
+        slots = []
+        for mat in other.data.materials or [None]:
+            if mat is not None and mat.name not in materials:
+                materials.append(mat)
+            slots.append(materials.find(mat.name) if mat is not None else 0)
+        indices = [0] * len(mesh.polygons)
+        mesh.polygons.foreach_get('material_index', indices)
+        mesh.polygons.foreach_set('material_index', [slots[min(i, len(slots) - 1)] for i in indices])
+        bm.from_mesh(mesh)
+        bpy.data.meshes.remove(mesh)
+        old_mesh = other.data
+        bpy.data.objects.remove(other)
+        if old_mesh.users == 0:
+            bpy.data.meshes.remove(old_mesh)
+    bm.to_mesh(target.data)
+    bm.free()
+    target.data.update()
+    if name:
+        target.name = name
+    return target
+
+
+def compose_matrices(locations, rotations=None, scales=None):
+    """(N, 4, 4) transforms from per-instance locations, XYZ euler rotations and scales.
+
+    Each argument is one (x, y, z) or one per instance; they broadcast to the longest.
+    """
+    args = [np.asarray(a, dtype=np.float64).reshape(-1, 3)
+            for a in (locations, rotations if rotations is not None else (0, 0, 0),
+                      scales if scales is not None else (1, 1, 1))]
+    n = max(len(a) for a in args)
+    loc, rot, scl = (np.broadcast_to(a, (n, 3)) for a in args)
+    cx, cy, cz = np.cos(rot).T
+    sx, sy, sz = np.sin(rot).T
+    matrices = np.zeros((n, 4, 4))
+    # Blender's XYZ euler: R = Rz @ Ry @ Rx
+    matrices[:, 0, 0] = cy * cz
+    matrices[:, 0, 1] = sx * sy * cz - cx * sz
+    matrices[:, 0, 2] = cx * sy * cz + sx * sz
+    matrices[:, 1, 0] = cy * sz
+    matrices[:, 1, 1] = sx * sy * sz + cx * cz
+    matrices[:, 1, 2] = cx * sy * sz - sx * cz
+    matrices[:, 2, 0] = -sy
+    matrices[:, 2, 1] = sx * cy
+    matrices[:, 2, 2] = cx * cy
+    matrices[:, :3, :3] *= scl[:, None, :]
+    matrices[:, :3, 3] = loc
+    matrices[:, 3, 3] = 1.0
+    return matrices
+
+
+def linear_array(count, start=(0, 0, 0), step=(1, 0, 0), rotations=None, scales=None):
+    """Transforms for `count` copies placed at start + i * step."""
+    locations = np.asarray(start, dtype=np.float64) + np.outer(np.arange(count), step)
+    return compose_matrices(locations, rotations, scales)
+
+
+def radial_array(count, radius, center=(0, 0, 0), start_angle=0.0, face_out=False,
+                 rotations=None, scales=None):
+    """Transforms for `count` copies evenly spaced on a circle around Z.
+
+    With face_out each copy is also turned around Z by its angle on the circle.
+    """
+    angles = start_angle + 2 * pi * np.arange(count) / count
+    locations = np.asarray(center, dtype=np.float64) + np.stack(
+        [radius * np.cos(angles), radius * np.sin(angles), np.zeros(count)], axis=1)
+    rot = np.zeros((count, 3)) + (rotations if rotations is not None else 0.0)
+    if face_out:
+        rot[:, 2] += angles
+    return compose_matrices(locations, rot, scales)
+
+
+def arc_array(count, radius, center=(0, 0, 0), start_angle=0.0, step=0.1, twist=1.0, scales=None):
+    """Transforms for `count` copies on an arc in front of `center` (angle 0 points to +Y).
+
+    `radius` is a scalar or an (x, y) pair for an elliptical arc; each copy turns
+    around Z by twist * its angle.
+    """
+    rx, ry = (radius, radius) if np.isscalar(radius) else radius
+    angles = start_angle + step * np.arange(count)
+    locations = np.asarray(center, dtype=np.float64) + np.stack(
+        [rx * np.sin(angles), ry * np.cos(angles), np.zeros(count)], axis=1)
+    rotations = np.stack([np.zeros(count), np.zeros(count), twist * angles], axis=1)
+    return compose_matrices(locations, rotations, scales)
+
+
+def _merged_mesh(src, matrices, name):
+    n = len(matrices)
+    nv, nl, npoly = len(src.vertices), len(src.loops), len(src.polygons)
+    co = np.empty(nv * 3, dtype=np.float32)
+    src.vertices.foreach_get('co', co)
+    co = np.c_[co.reshape(-1, 3), np.ones(nv)]
+    loop_verts = np.empty(nl, dtype=np.int32)
+    src.loops.foreach_get('vertex_index', loop_verts)
+    loop_start = np.empty(npoly, dtype=np.int32)
+    src.polygons.foreach_get('loop_start', loop_start)
+    smooth = np.empty(npoly, dtype=bool)
+    src.polygons.foreach_get('use_smooth', smooth)
+    mat_index = np.empty(npoly, dtype=np.int32)
+    src.polygons.foreach_get('material_index', mat_index)
+    copies = np.arange(n)[:, None]
+
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(n * nv)
+    mesh.vertices.foreach_set('co', np.einsum('nij,vj->nvi', matrices, co)[..., :3].astype(np.float32).ravel())
+    mesh.loops.add(n * nl)
+    mesh.loops.foreach_set('vertex_index', (loop_verts + nv * copies).ravel())
+    mesh.polygons.add(n * npoly)
+    mesh.polygons.foreach_set('loop_start', (loop_start + nl * copies).ravel())
+    if bpy.app.version < (4, 0, 0):
+        loop_total = np.empty(npoly, dtype=np.int32)
+        src.polygons.foreach_get('loop_total', loop_total)
+        mesh.polygons.foreach_set('loop_total', np.tile(loop_total, n))
+    mesh.polygons.foreach_set('use_smooth', np.tile(smooth, n))
+    mesh.polygons.foreach_set('material_index', np.tile(mat_index, n))
+    for layer in src.uv_layers:
+        uv = np.empty(nl * 2, dtype=np.float32)
+        layer.data.foreach_get('uv', uv)
+        mesh.uv_layers.new(name=layer.name).data.foreach_set('uv', np.tile(uv, n))
+    for mat in src.materials:
+        mesh.materials.append(mat)
+    mesh.update(calc_edges=True)
+    return mesh
+
+
+@contextmanager
+def _evaluated_mesh(obj):
+    """`obj`'s mesh with its modifiers applied, also for a part of a build_batch().
+
+    The depsgraph only sees the scene, and a batch collection is linked on exit,
+    so a part outside the scene is linked to it for the evaluation.
+    """
+    scene = bpy.context.scene
+    outside = scene.objects.get(obj.name) != obj
+    if outside:
+        scene.collection.objects.link(obj)
+        bpy.context.view_layer.update()
+    evaluated = obj.evaluated_get(bpy.context.evaluated_depsgraph_get())
+    try:
+        yield evaluated.to_mesh()
+    finally:
+        evaluated.to_mesh_clear()
+        if outside:
+            scene.collection.objects.unlink(obj)
+
+
+def _merged_array(template, matrices, name):
+    data = template.data
+    # the merged object has no modifiers of its own: the template's (bevel, subsurf,
+    # ...) are applied once and every copy is made from the evaluated mesh
+    if template.modifiers:
+        with _evaluated_mesh(template) as evaluated:
+            mesh = _merged_mesh(evaluated, matrices, name)
+    else:
+        mesh = _merged_mesh(data, matrices, name)
+
+    obj = bpy.data.objects.new(name, mesh)
+    for collection in template.users_collection:
+        collection.objects.link(obj)
+    _retag(template, obj)
+    bpy.data.objects.remove(template)
+    if data.users == 0:
+        bpy.data.meshes.remove(data)
+    return obj
+
+
+def _new_group_socket(group, name, in_out, socket_type):
+    if hasattr(group, 'interface'):
+        # Blender 4.0+
+        return group.interface.new_socket(name, in_out=in_out, socket_type=socket_type)
+    return (group.inputs if in_out == 'INPUT' else group.outputs).new(socket_type, name)
+
+
+def _group_input_id(group, name):
+    """Identifier of a node group input, i.e. the modifier property holding its value."""
+    if hasattr(group, 'interface'):
+        return next(item.identifier for item in group.interface.items_tree
+                    if item.item_type == 'SOCKET' and item.in_out == 'INPUT' and item.name == name)
+    return group.inputs[name].identifier
+
+
+def _geometry_group(name, inputs=()):
+    """New modifier node group with a Geometry input/output plus `inputs` [(name, socket type)]."""
+    group = bpy.data.node_groups.new(name, 'GeometryNodeTree')
+    _new_group_socket(group, 'Geometry', 'INPUT', 'NodeSocketGeometry')
+    for socket_name, socket_type in inputs:
+        _new_group_socket(group, socket_name, 'INPUT', socket_type)
+    _new_group_socket(group, 'Geometry', 'OUTPUT', 'NodeSocketGeometry')
+    if hasattr(group, 'is_modifier'):
+        group.is_modifier = True
+    return group, group.nodes.new('NodeGroupInput'), group.nodes.new('NodeGroupOutput')
+
+
+def array_group():
+    """Shared group: instance the Object input on every point, rotated and scaled per point."""
+    group = bpy.data.node_groups.get(ARRAY_GROUP) or from_library('node_groups', ARRAY_GROUP)
+    if group is not None:
+        return group
+    group, group_in, group_out = _geometry_group(ARRAY_GROUP, [('Object', 'NodeSocketObject')])
+    nodes, links = group.nodes, group.links
+    info = nodes.new('GeometryNodeObjectInfo')
+    info.transform_space = 'ORIGINAL'
+    instance = nodes.new('GeometryNodeInstanceOnPoints')
+    links.new(group_in.outputs['Object'], info.inputs['Object'])
+    links.new(group_in.outputs['Geometry'], instance.inputs['Points'])
+    links.new(info.outputs['Geometry'], instance.inputs['Instance'])
+    for attribute, socket in (('instance_rotation', 'Rotation'), ('instance_scale', 'Scale')):
+        named = nodes.new('GeometryNodeInputNamedAttribute')
+        named.data_type = 'FLOAT_VECTOR'
+        named.inputs['Name'].default_value = attribute
+        # Blender 3.x has one (hidden) output per data type
+        links.new(next(out for out in named.outputs if out.enabled), instance.inputs[socket])
+    links.new(instance.outputs['Instances'], group_out.inputs['Geometry'])
+    return group
+
+
+def realize_group():
+    group = bpy.data.node_groups.get(REALIZE_GROUP) or from_library('node_groups', REALIZE_GROUP)
+    if group is not None:
+        return group
+    group, group_in, group_out = _geometry_group(REALIZE_GROUP)
+    realize = group.nodes.new('GeometryNodeRealizeInstances')
+    group.links.new(group_in.outputs['Geometry'], realize.inputs['Geometry'])
+    group.links.new(realize.outputs['Geometry'], group_out.inputs['Geometry'])
+    return group
+
+
+def _decompose(matrices):
+    """Locations, XYZ euler rotations and scales of (N, 4, 4) transforms (shear is dropped)."""
+    basis = matrices[:, :3, :3]
+    scales = np.linalg.norm(basis, axis=1)
+    rot = basis / scales[:, None, :]
+    rotations = np.stack([np.arctan2(rot[:, 2, 1], rot[:, 2, 2]),
+                          np.arcsin(np.clip(-rot[:, 2, 0], -1.0, 1.0)),
+                          np.arctan2(rot[:, 1, 0], rot[:, 0, 0])], axis=1)
+    return matrices[:, :3, 3], rotations, scales
+
+
+def _geonodes_array(template, matrices, name):
+    locations, rotations, scales = _decompose(matrices)
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(locations))
+    mesh.vertices.foreach_set('co', locations.astype(np.float32).ravel())
+    for attribute, values in (('instance_rotation', rotations), ('instance_scale', scales)):
+        layer = mesh.attributes.new(attribute, 'FLOAT_VECTOR', 'POINT')
+        layer.data.foreach_set('vector', values.astype(np.float32).ravel())
+    # the realized instances index the template's slots; without the same slots on the
+    # carrier, the FBX exporter and export_prep (merge, draw calls, culling) see no materials
+    for slot in template.material_slots:
+        mesh.materials.append(slot.material)
+
+    obj = bpy.data.objects.new(name, mesh)
+    group = array_group()
+    modifier = obj.modifiers.new(ARRAY_MODIFIER, 'NODES')
+    modifier.node_group = group
+    modifier[_group_input_id(group, 'Object')] = template
+    # the template stays out of the scene; only the carrier object is linked
+    for collection in list(template.users_collection):
+        collection.objects.link(obj)
+        collection.objects.unlink(template)
+    template.name = name + '_Template'
+    _retag(template, obj)
+    return obj
+
+
+def _retag(template, obj):
+    """Move the template's part tags to the array object that replaces it."""
+    if template.get(ASSET_PROP) is not None:
+        tag_part(obj, template.get(ROLE_PROP), template[ASSET_PROP], obj.name, template.get(LOD_PROP))
+        _untag(template)
+
+
+def array_template(obj):
+    """Part instanced by a GEONODES array carrier, or None for other objects."""
+    modifier = obj.modifiers.get(ARRAY_MODIFIER)
+    if modifier is None or modifier.node_group is None:
+        return None
+    return modifier[_group_input_id(modifier.node_group, 'Object')]
+
+
+@contextmanager
+def realized_arrays():
+    """Realize the instances of every GEONODES array in the scene while the block runs.
+
+    The viewport keeps evaluating them lazily as instances; exporters only see real
+    mesh data, so export_fbx() runs inside this.
+    """
+    added = []
+    for obj in bpy.context.scene.objects:
+        if obj.modifiers.get(ARRAY_MODIFIER) is not None:
+            modifier = obj.modifiers.new(REALIZE_MODIFIER, 'NODES')
+            modifier.node_group = realize_group()
+            added.append((obj, modifier))
+    try:
+        yield
+    finally:
+        for obj, modifier in added:
+            obj.modifiers.remove(modifier)
+
+
+def array_objects(template, matrices, mode=None, name=None):
+    """Repeat `template` once per transform in `matrices` (from *_array()).
+
+    The array transforms are applied on top of the template's own transform.
+    mode='INSTANCES' returns objects `<name>_<i>` that share the template's mesh
+    (the template itself becomes copy 0); mode='MERGED' returns a single object
+    holding all copies in one mesh with the template's modifiers applied, and
+    removes the template; mode='GEONODES'
+    returns a single point-cloud object that instances the template (kept out of
+    the scene as `<name>_Template`). The default is ARRAY_MODE.
+    """
+    mode = mode or ARRAY_MODE
+    name = name or template.name
+    matrices = np.asarray(matrices) @ np.array(template.matrix_basis)
+    if mode == 'MERGED':
+        return [_merged_array(template, matrices, name)]
+    if mode == 'GEONODES':
+        return [_geonodes_array(template, matrices, name)]
+    objects = []
+    for i, matrix in enumerate(matrices):
+        obj = template if i == 0 else template.copy()
+        if i:
+            for collection in template.users_collection:
+                collection.objects.link(obj)
+        obj.name = '%s_%d' % (name, i)
+        obj.matrix_basis = Matrix(matrix.tolist())
+        objects.append(tag_part(obj, part=obj.name))
+    return objects
+
+
+# Asset specs (specs/<asset>.json):
+#   {"name": "Keris", "root": "KerisRoot",
+#    "materials": {"Keris_Wood": {"base_color": [0.4, 0.2, 0.1, 1], "roughness": 0.7}, ...},
+#    "parts": [{"name": "Hulu", "type": "cylinder", "params": {"vertices": 12, "radius": 0.05},
+#               "location": [0, -0.06, 1.0], "rotation": [20, 0, 0], "scale": [1, 1, 1],
+#               "smooth": false, "material": "Keris_Wood", "role": "<default: the material>",
+#               "parent": "<part name, default: root>",
+#               "array": {"kind": "linear", "count": 8, "start": [0, 0, 0], "step": [0.2, 0, 0]}}, ...]}
+# "type" is cube/cylinder/cone/uv_sphere/torus with the matching add_*() arguments as
+# "params"; "array" takes the arguments of linear_array()/radial_array()/arc_array().
+# Angles are in degrees. A part's transform is relative to its parent.
+SPEC_PRIMITIVES = {
+    'cube': (add_cube, _fill_cube),
+    'cylinder': (add_cylinder, _fill_cylinder),
+    'cone': (add_cone, _fill_cone),
+    'uv_sphere': (add_uv_sphere, _fill_uv_sphere),
+    'torus': (add_torus, _fill_torus),
+}
+# array kind -> (transform generator, arguments given in degrees)
+SPEC_ARRAYS = {
+    'linear': (linear_array, ('rotations',)),
+    'radial': (radial_array, ('start_angle', 'rotations')),
+    'arc': (arc_array, ('start_angle', 'step')),
+}
+
+
+def load_spec(name):
+    """Asset spec specs/<name>.json, or the '<name>.json' text of the open .blend."""
+    path = os.path.join(SPECS_DIR, name + '.json')
+    if not os.path.isfile(path) and name + '.json' in bpy.data.texts:
+        return json.loads(bpy.data.texts[name + '.json'].as_string())
+    with open(path) as f:
+        return json.load(f)
+
+
+def _spec_array(array):
+    array = dict(array)
+    make, angle_args = SPEC_ARRAYS[array.pop('kind')]
+    for arg in angle_args:
+        if arg in array:
+            array[arg] = np.radians(array[arg])
+    return make(**array)
+
+
+def _spec_transform(part):
+    return (part.get('location', (0, 0, 0)),
+            [radians(a) for a in part.get('rotation', (0, 0, 0))],
+            part.get('scale', (1, 1, 1)))
+
+
+def _spec_matrix(part, parts):
+    location, rotation, scale = _spec_transform(part)
+    matrix = (Matrix.Translation(location) @ Euler(rotation).to_matrix().to_4x4()
+              @ Matrix.Diagonal(Vector(scale).to_4d()))
+    if part.get('parent'):
+        matrix = _spec_matrix(parts[part['parent']], parts) @ matrix
+    return matrix
+
+
+def _build_spec_parts(spec, materials, root):
+    objects = {}
+    for part in spec['parts']:
+        add = SPEC_PRIMITIVES[part['type']][0]
+        location, rotation, scale = _spec_transform(part)
+        obj = add(part['name'], location=location, rotation=rotation, scale=scale,
+                  smooth=part.get('smooth', False), role=part.get('role', part['material']),
+                  **part.get('params', {}))
+        objects[part['name']] = obj
+        parent = objects[part['parent']] if part.get('parent') else root
+        for copy in array_objects(obj, _spec_array(part['array'])) if 'array' in part else [obj]:
+            assign_material(copy, materials[part['material']])
+            copy.parent = parent
+
+
+def _build_spec_merged(spec, materials, root):
+    parts = {part['name']: part for part in spec['parts']}
+    meshes = {}
+    for part in spec['parts']:
+        bm = meshes.get(part['material'])
+        if bm is None:
+            bm = meshes[part['material']] = bmesh.new()
+            bm.loops.layers.uv.new('UVMap')
+        fill = SPEC_PRIMITIVES[part['type']][1]
+        matrix = _spec_matrix(part, parts)
+        matrices = [matrix]
+        if 'array' in part:
+            matrices = [Matrix(m.tolist()) for m in _spec_array(part['array']) @ np.array(matrix)]
+        for matrix in matrices:
+            verts = fill(bm, matrix, **tessellate(part.get('params', {})))
+            if part.get('smooth'):
+                for face in {face for v in verts for face in v.link_faces}:
+                    face.smooth = True
+    for material, bm in meshes.items():
+        mesh = bpy.data.meshes.new(material)
+        bm.to_mesh(mesh)
+        bm.free()
+        obj = bpy.data.objects.new(material, mesh)
+        (_batch_collection or bpy.context.collection).objects.link(obj)
+        assign_material(obj, materials[material])
+        tag_part(obj, material)
+        obj.parent = root
+
+
+def build_from_spec(spec, merged=False):
+    """Build an asset from its spec (see load_spec()) and return the root empty.
+
+    By default every part becomes an object named as in the spec, like the
+    hand-written builders. With merged=True the parts of each material are written
+    into one bmesh in a single pass and become one object named after the material.
+    """
+    with build_batch(spec['name']):
+        materials = {name: make_material(name, **params) for name, params in spec['materials'].items()}
+        root = add_empty_at(spec['root'], (0, 0, 0))
+        if merged:
+            _build_spec_merged(spec, materials, root)
+        else:
+            _build_spec_parts(spec, materials, root)
+    return root
+
+
+def export_fbx(filepath, apply_scale='FBX_SCALE_ALL', bake_space_transform=True, asset=None, objects=None):
+    # with `asset`, only the parts tagged for that asset are exported, e.g. from a gallery scene;
+    # `objects` picks the exported objects explicitly (export_prep stages its copies this way)
+    if asset is not None and objects is None:
+        objects = parts(asset)
+    if objects is not None:
+        for obj in bpy.context.view_layer.objects.selected:
+            obj.select_set(False)
+        for obj in objects:
+            obj.select_set(True)
+    with realized_arrays():
+        bpy.ops.export_scene.fbx(
+            filepath=filepath,
+            use_selection=objects is not None,
+            apply_scale_options=apply_scale,
+            bake_space_transform=bake_space_transform,
+            object_types={'MESH', 'EMPTY'},
+            use_mesh_modifiers=True,
+            add_leaf_bones=False,
+            path_mode='AUTO')
@@ -0,0 +1,83 @@
+# Cull check: build assets, merge them as the export does and run
+# export_prep.cull_hidden_faces() on the merged meshes; verify that see-through
+# shells (auras, flames) lose no faces and that the parts listed in KEEP keep at
+# least that many faces (the payung tassels sit inside its translucent Shield_Aura).
+# Materials culled completely are listed as notes: parts modeled entirely inside
+# others (teeth in a closed mouth, an iris sunk into the eyeball) are meant to go.
+# Run inside Blender:
+#   blender --background --factory-startup --python-exit-code 1 --python bpy-scripts/cull_check.py -- [asset ...] [--samples 32]
+# Exits with status 1 (through --python-exit-code) when a check fails.
+import argparse
+import importlib
+import os
+import sys
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import common_utils
+import export_prep
+from assets import ASSETS, EXPORT_QUALITY
+
+# asset -> {material: faces its merged mesh keeps at least}
+KEEP = {
+    # 8 tassels of 8 sides each
+    'payung': {'PayungTassel': 64},
+}
+
+
+def check_asset(name, samples):
+    common_utils.QUALITY = EXPORT_QUALITY
+    importlib.import_module(ASSETS[name].module).main(filepath_fbx=None)
+    problems = []
+    hidden = []
+    with export_prep.merged_by_material() as (objects, merged, _):
+        before = {obj: len(obj.data.polygons) for obj in merged}
+        report = export_prep.cull_hidden_faces(objects, merged, samples)
+        for obj in merged:
+            mat = obj.data.materials[0] if obj.data.materials else None
+            label = mat.name if mat is not None else obj.name
+            faces = len(obj.data.polygons)
+            if not faces:
+                hidden.append(label)
+            if export_prep.see_through(mat) and faces != before[obj]:
+                problems.append('%s: see-through, %d -> %d faces' % (label, before[obj], faces))
+            if faces < KEEP.get(name, {}).get(label, 0):
+                problems.append('%s: %d -> %d faces, needs %d' % (label, before[obj], faces, KEEP[name][label]))
+    print('%-12s %d of %d faces culled' % (name, report['faces_removed'], report['faces_before']))
+    if hidden:
+        print('%-12s hidden entirely: %s' % ('', ', '.join(hidden)))
+    return problems
+
+
+def main():
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    parser = argparse.ArgumentParser(prog='cull_check.py')
+    parser.add_argument('assets', nargs='*', metavar='asset')
+    parser.add_argument('--samples', type=int, default=32, help='ray directions per face')
+    args = parser.parse_args(argv)
+    unknown = sorted(set(args.assets) - set(ASSETS))
+    if unknown:
+        parser.error('unknown asset(s): %s' % ', '.join(unknown))
+
+    failed = []
+    quality = common_utils.QUALITY
+    try:
+        for name in args.assets or list(ASSETS):
+            problems = check_asset(name, args.samples)
+            print('%-12s %s' % (name, 'ok' if not problems else 'FAIL'))
+            for problem in problems:
+                print('    ' + problem)
+            if problems:
+                failed.append(name)
+    finally:
+        common_utils.QUALITY = quality
+    common_utils.reset_scene()
+    if failed:
+        print('failed: %s' % ', '.join(failed))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,902 @@
+# Export preparation passes, run on a built scene right before the FBX is written
+# export_asset() runs the enabled passes, exports with common_utils.export_fbx() and
+# writes what each pass did to `<fbx>.report.json` next to the FBX.
+# Passes that change the scene in place (dedupe_meshes) also benefit the saved .blend;
+# staging passes (capped_modifiers, merged_by_material, consolidated, split_oversized,
+# collision_proxies) change or copy the scene for the export only and undo that afterwards.
+import hashlib
+import json
+import os
+from contextlib import ExitStack, contextmanager
+
+import bpy
+import bmesh
+import numpy as np
+from mathutils import Matrix, Vector
+from mathutils.bvhtree import BVHTree
+
+try:
+    from common_utils import (ASSET_PROP, PART_PROP, ROLE_PROP, export_fbx, parts, realized_arrays,
+                              shade_smooth, tag_part, world_matrix)
+except ModuleNotFoundError:
+    if 'common_utils.py' in bpy.data.texts:
+        exec(bpy.data.texts['common_utils.py'].as_string(), globals())
+    else:
+        raise
+
+# Per-asset limits on the exported (evaluated) geometry, see check_budget()
+BUDGETS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'budgets.json')
+
+# Marks the export-only objects made by the staging passes
+STAGED_PROP = 'ktd_export_only'
+
+# Consolidated meshes (consolidated()) carry the part colors in this color attribute
+VERTEX_COLORS = 'Col'
+VERTEX_COLOR_MATERIAL = 'KTD_VertexColor'
+
+# Roblox rejects or decimates a MeshPart above this many triangles; split_oversized() cuts
+# bigger meshes into chunks under it
+MAX_TRIANGLES = 10000
+
+# Decimate ratios of LOD1, LOD2, ... per asset class. Enemies come in waves of 50+
+# on screen, so they drop detail faster than towers.
+LOD_RATIOS = {
+    'enemy': (0.4, 0.15),
+    'tower': (0.6, 0.3),
+}
+
+
+class BudgetError(Exception):
+    """An asset's export is over its limits in budgets.json."""
+
+
+def _mesh_objects(asset=None):
+    objects = parts(asset) if asset is not None else bpy.context.scene.objects
+    return [obj for obj in objects if obj.type == 'MESH']
+
+
+def _mesh_arrays(mesh):
+    """Geometry of `mesh` as flat NumPy arrays: vertices, edges, faces, smoothing, UVs."""
+    arrays = []
+    for collection, attr, dtype, width in (
+            (mesh.vertices, 'co', np.float32, 3),
+            (mesh.edges, 'vertices', np.int32, 2),
+            (mesh.polygons, 'loop_total', np.int32, 1),
+            (mesh.polygons, 'material_index', np.int32, 1),
+            (mesh.polygons, 'use_smooth', bool, 1),
+            (mesh.loops, 'vertex_index', np.int32, 1)):
+        data = np.empty(len(collection) * width, dtype=dtype)
+        collection.foreach_get(attr, data)
+        arrays.append(data)
+    for layer in mesh.uv_layers:
+        data = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+        layer.data.foreach_get('uv', data)
+        arrays.append(data)
+    return arrays
+
+
+def mesh_key(mesh):
+    """Hash of the mesh's geometry, UVs and material slots; equal keys mean identical meshes."""
+    digest = hashlib.sha256()
+    for data in _mesh_arrays(mesh):
+        digest.update(str(data.shape).encode())
+        digest.update(data.tobytes())
+    for mat in mesh.materials:
+        digest.update((mat.name if mat else '').encode() + b'\0')
+    return digest.hexdigest()
+
+
+def dedupe_meshes(asset=None):
+    """Relink objects whose meshes are identical to one shared mesh datablock.
+
+    Object transforms and modifiers stay per object. Meshes with shape keys and
+    linked meshes are left alone. The duplicates are removed; returns the counts
+    and the bytes of mesh arrays saved.
+    """
+    shared = {}
+    keys = {}
+    duplicates = set()
+    relinked = 0
+    saved = 0
+    for obj in sorted(_mesh_objects(asset), key=lambda o: o.name):
+        mesh = obj.data
+        if mesh.library is not None or mesh.shape_keys is not None:
+            continue
+        if mesh not in keys:
+            keys[mesh] = mesh_key(mesh)
+        key = keys[mesh]
+        keep = shared.setdefault(key, mesh)
+        if keep != mesh:
+            obj.data = keep
+            relinked += 1
+            if mesh.users == 0:
+                duplicates.add(mesh)
+                saved += sum(data.nbytes for data in _mesh_arrays(mesh))
+    meshes = len({obj.data for obj in _mesh_objects(asset)})
+    bpy.data.batch_remove(duplicates)
+    return {'meshes_before': meshes + len(duplicates), 'meshes_after': meshes,
+            'relinked': relinked, 'bytes_saved': saved}
+
+
+def _export_set(asset=None):
+    objects = parts(asset) if asset is not None else bpy.context.scene.objects
+    return [obj for obj in objects if obj.type in {'MESH', 'EMPTY'}]
+
+
+def _material_indices(mesh):
+    indices = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('material_index', indices)
+    return indices
+
+
+def draw_calls(obj, depsgraph):
+    """Draws `obj` costs in the engine: one per material its evaluated mesh uses."""
+    mesh = obj.evaluated_get(depsgraph).to_mesh()
+    try:
+        slots = [slot.material for slot in obj.material_slots] or [None]
+        used = np.unique(np.minimum(_material_indices(mesh), len(slots) - 1))
+        return len({slots[i] for i in used})
+    finally:
+        obj.evaluated_get(depsgraph).to_mesh_clear()
+
+
+def _gather_root(root, meshes, depsgraph):
+    """One bmesh of `meshes` (evaluated) in `root`'s space, and its materials by face material_index."""
+    to_root = world_matrix(root).inverted()
+    materials = []
+    bm = bmesh.new()
+    for obj in meshes:
+        mesh = bpy.data.meshes.new_from_object(obj.evaluated_get(depsgraph))
+        matrix = to_root @ world_matrix(obj)
+        mesh.transform(matrix)
+        slots = []
+        for slot in obj.material_slots or [None]:
+            mat = slot.material if slot is not None else None
+            if mat not in materials:
+                materials.append(mat)
+            slots.append(materials.index(mat))
+        indices = np.asarray(slots)[np.minimum(_material_indices(mesh), len(slots) - 1)]
+        mesh.polygons.foreach_set('material_index', indices.astype(np.int32))
+        if matrix.determinant() < 0:
+            # a mirroring transform turns the faces inside out
+            mirrored = bmesh.new()
+            mirrored.from_mesh(mesh)
+            bmesh.ops.reverse_faces(mirrored, faces=mirrored.faces)
+            mirrored.to_mesh(mesh)
+            mirrored.free()
+        bm.from_mesh(mesh)
+        bpy.data.meshes.remove(mesh)
+    return bm, materials
+
+
+def _stem(root):
+    return root.name[:-len('Root')] if root.name.endswith('Root') else root.name
+
+
+def _root_meshes(root):
+    """Scene meshes under `root`, without the export-only objects of the staging passes."""
+    scene_objects = set(bpy.context.scene.objects)
+    return [obj for obj in root.children_recursive
+            if obj.type == 'MESH' and obj in scene_objects and STAGED_PROP not in obj]
+
+
+def _stage_object(name, mesh, root):
+    obj = bpy.data.objects.new(name, mesh)
+    obj[STAGED_PROP] = True
+    for collection in root.users_collection:
+        collection.objects.link(obj)
+    obj.parent = root
+    return obj
+
+
+def _merge_root(root, meshes, depsgraph):
+    """One new object per material holding `meshes` (evaluated) in `root`'s space."""
+    bm, materials = _gather_root(root, meshes, depsgraph)
+    merged = []
+    for index, mat in enumerate(materials):
+        part = bm.copy()
+        bmesh.ops.delete(part, geom=[f for f in part.faces if f.material_index != index], context='FACES')
+        if part.faces:
+            for face in part.faces:
+                face.material_index = 0
+            name = '%s_%s' % (_stem(root), mat.name if mat is not None else 'NoMaterial')
+            mesh = bpy.data.meshes.new(name)
+            part.to_mesh(mesh)
+            mesh.materials.append(mat)
+            merged.append(_stage_object(name, mesh, root))
+        part.free()
+    bm.free()
+    return merged
+
+
+def _material_color(mat):
+    """RGBA a material shows: its Principled Base Color, else its viewport color."""
+    if mat is None:
+        return (0.8, 0.8, 0.8, 1.0)
+    if mat.use_nodes:
+        for node in mat.node_tree.nodes:
+            if node.type == 'BSDF_PRINCIPLED':
+                return tuple(node.inputs['Base Color'].default_value)
+    return tuple(mat.diffuse_color)
+
+
+def _vertex_color_material():
+    mat = bpy.data.materials.get(VERTEX_COLOR_MATERIAL)
+    if mat is None:
+        mat = bpy.data.materials.new(VERTEX_COLOR_MATERIAL)
+        mat.use_nodes = True
+        nodes = mat.node_tree.nodes
+        principled = next(node for node in nodes if node.type == 'BSDF_PRINCIPLED')
+        colors = nodes.new('ShaderNodeVertexColor')
+        colors.layer_name = VERTEX_COLORS
+        mat.node_tree.links.new(colors.outputs['Color'], principled.inputs['Base Color'])
+    return mat
+
+
+def _mesh_triangles(mesh):
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('loop_total', loop_totals)
+    return int((loop_totals - 2).sum())
+
+
+def _apply_modifiers(obj):
+    """Replace obj's mesh by its evaluated mesh and drop the modifiers."""
+    old = obj.data
+    mesh = bpy.data.meshes.new_from_object(obj.evaluated_get(bpy.context.evaluated_depsgraph_get()))
+    obj.modifiers.clear()
+    obj.data = mesh
+    mesh.name = old.name
+    bpy.data.meshes.remove(old)
+    return mesh
+
+
+def _consolidate_root(root, meshes, depsgraph, voxel_size, triangles):
+    """One watertight, vertex-colored mesh for `meshes`: voxel remesh, decimate, color transfer."""
+    bm, materials = _gather_root(root, meshes, depsgraph)
+    colors = np.array([_material_color(mat) for mat in materials], dtype=np.float32)
+    face_colors = colors[[face.material_index for face in bm.faces]]
+    source = BVHTree.FromBMesh(bm)
+    name = '%s_Consolidated' % _stem(root)
+    mesh = bpy.data.meshes.new(name)
+    bm.to_mesh(mesh)
+    bm.free()
+    obj = _stage_object(name, mesh, root)
+
+    remesh = obj.modifiers.new('Remesh', 'REMESH')
+    remesh.mode = 'VOXEL'
+    remesh.voxel_size = voxel_size
+    mesh = _apply_modifiers(obj)
+    remeshed = _mesh_triangles(mesh)
+    if remeshed > triangles:
+        decimate = obj.modifiers.new('Decimate', 'DECIMATE')
+        decimate.ratio = triangles / remeshed
+        mesh = _apply_modifiers(obj)
+
+    # each vertex takes the color of the nearest face of the original parts
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', co)
+    nearest = [source.find_nearest(Vector(v))[2] for v in co.reshape(-1, 3)]
+    attribute = mesh.color_attributes.new(VERTEX_COLORS, 'FLOAT_COLOR', 'POINT')
+    attribute.data.foreach_set('color', face_colors[[i if i is not None else 0 for i in nearest]].ravel())
+    mesh.materials.clear()
+    mesh.materials.append(_vertex_color_material())
+    shade_smooth(obj)
+    return [obj]
+
+
+@contextmanager
+def _staged_roots(asset, stage_root):
+    """Replace each `*Root` hierarchy by the objects stage_root(root, meshes, depsgraph) makes.
+
+    Yields (objects to export, the staged objects, report). The root empties stay as
+    pivots; parts outside any root are exported as they are. The staged objects are
+    removed when the block exits, so the scene keeps its separate parts.
+    """
+    exported = _export_set(asset)
+    roots = [obj for obj in exported if obj.get(ROLE_PROP) == 'root']
+    hierarchy = {child for root in roots for child in root.children_recursive}
+    staged = []
+    with realized_arrays():
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+        draws_before = sum(draw_calls(obj, depsgraph) for obj in exported if obj.type == 'MESH')
+        for root in roots:
+            meshes = _root_meshes(root)
+            staged += stage_root(root, meshes, depsgraph)
+        kept = [obj for obj in exported if obj not in hierarchy]
+        draws_after = len(staged) + sum(draw_calls(obj, depsgraph) for obj in kept if obj.type == 'MESH')
+    objects = kept + staged
+    report = {
+        'objects_before': sum(1 for obj in exported if obj.type == 'MESH'),
+        'objects_after': sum(1 for obj in objects if obj.type == 'MESH'),
+        'draw_calls_before': draws_before,
+        'draw_calls_after': draws_after,
+    }
+    try:
+        yield objects, staged, report
+    finally:
+        bpy.data.batch_remove(set(staged) | {obj.data for obj in staged})
+
+
+@contextmanager
+def merged_by_material(asset=None):
+    """Stage each `*Root` hierarchy as one mesh per material, parented to the root.
+
+    Yields (objects to export, the staged objects, report); see _staged_roots().
+    """
+    with _staged_roots(asset, _merge_root) as staged:
+        yield staged
+
+
+@contextmanager
+def consolidated(asset=None, voxel_size=0.02, triangles=4000):
+    """Stage each `*Root` hierarchy as one watertight mesh, parented to the root.
+
+    The overlapping parts are voxel remeshed at `voxel_size` (meters), decimated
+    to at most `triangles` and colored per vertex from the parts' materials
+    (color attribute VERTEX_COLORS, shown by one shared material). Yields
+    (objects to export, the staged objects, report); see _staged_roots().
+    """
+    def stage_root(root, meshes, depsgraph):
+        return _consolidate_root(root, meshes, depsgraph, voxel_size, triangles)
+
+    with _staged_roots(asset, stage_root) as (objects, staged, report):
+        report.update(voxel_size=voxel_size, triangles=sum(_mesh_triangles(obj.data) for obj in staged))
+        yield objects, staged, report
+
+
+def triangle_count(obj, depsgraph):
+    """Triangles of `obj` as evaluated (modifiers applied)."""
+    mesh = obj.evaluated_get(depsgraph).to_mesh()
+    try:
+        mesh.calc_loop_triangles()
+        return len(mesh.loop_triangles)
+    finally:
+        obj.evaluated_get(depsgraph).to_mesh_clear()
+
+
+def mesh_stats(obj, depsgraph):
+    """Triangles, vertices and materials of `obj` as evaluated (subsurf, displace, arrays)."""
+    mesh = obj.evaluated_get(depsgraph).to_mesh()
+    try:
+        mesh.calc_loop_triangles()
+        slots = [slot.material for slot in obj.material_slots] or [None]
+        used = np.unique(np.minimum(_material_indices(mesh), len(slots) - 1))
+        return {'triangles': len(mesh.loop_triangles), 'vertices': len(mesh.vertices),
+                'materials': sorted({slots[i].name for i in used if slots[i] is not None})}
+    finally:
+        obj.evaluated_get(depsgraph).to_mesh_clear()
+
+
+def profile(objects):
+    """Evaluated stats per mesh object in `objects` and their totals.
+
+    {'parts': {name: {'triangles', 'vertices', 'materials'}},
+     'total': {'triangles', 'vertices', 'materials', 'objects'}}, where the
+    total counts distinct materials.
+    """
+    with realized_arrays():
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+        stats = {obj.name: mesh_stats(obj, depsgraph) for obj in objects if obj.type == 'MESH'}
+    materials = set()
+    for entry in stats.values():
+        materials.update(entry['materials'])
+        entry['materials'] = len(entry['materials'])
+    total = {'triangles': sum(e['triangles'] for e in stats.values()),
+             'vertices': sum(e['vertices'] for e in stats.values()),
+             'materials': len(materials), 'objects': len(stats)}
+    return {'parts': stats, 'total': total}
+
+
+def load_budget(name, kind):
+    """Limits for asset `name`: the entry for its class in budgets.json, overridden per asset."""
+    with open(BUDGETS_PATH) as f:
+        budgets = json.load(f)
+    budget = dict(budgets['kinds'].get(kind, {}))
+    budget.update(budgets['assets'].get(name, {}))
+    return budget
+
+
+# budgets.json holds each asset's largest measured export (Blender 4.2, 'game' and
+# 'hero', plain and release presets) plus 25% headroom: triangles and vertices rounded
+# up to 100, materials + 2. The kinds are the largest asset limit of their class, for
+# assets not measured yet. Measured (triangles, vertices, materials, objects):
+#   keris 350/195/5/10, tombak 842/439/4/11, obor 300/164/7/8, gamelan 5988/3040/5/26,
+#   payung 6392/3250/7/30, genderuwo 3268/1684/5/25, tuyul 34272/17170/6/17,
+#   kuntilanak 29380/14892/7/37 (all 'hero' plain exports, the largest case).
+# Re-measure after a change in detail and update the asset's entry.
+def check_budget(total, budget):
+    """Messages for every stat in `total` over its limit in `budget` (empty when within)."""
+    return ['%s %d > %d' % (stat, total[stat], limit)
+            for stat, limit in sorted(budget.items()) if total.get(stat, 0) > limit]
+
+
+def _total_triangles(objects):
+    with realized_arrays():
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+        return sum(triangle_count(obj, depsgraph) for obj in objects if obj.type == 'MESH')
+
+
+@contextmanager
+def capped_modifiers(objects, subsurf=1, displace=1.0):
+    """Cap Subdivision levels at `subsurf` and scale Displace strength by `displace` while the block runs.
+
+    Both the viewport and render levels are capped, since exporters evaluate
+    either. displace=0 turns Displace off. The modifiers are restored on exit,
+    so the .blend keeps its render quality. Yields the report (triangles of
+    `objects` before and after).
+    """
+    report = {'triangles_before': _total_triangles(objects), 'subsurf': subsurf, 'displace': displace}
+    changed = []
+    for obj in objects:
+        for modifier in obj.modifiers:
+            if modifier.type == 'SUBSURF' and subsurf is not None:
+                changed.append((modifier, {'levels': modifier.levels, 'render_levels': modifier.render_levels}))
+                modifier.levels = min(modifier.levels, subsurf)
+                modifier.render_levels = min(modifier.render_levels, subsurf)
+            elif modifier.type == 'DISPLACE' and displace != 1.0:
+                changed.append((modifier, {'strength': modifier.strength, 'show_viewport': modifier.show_viewport,
+                                           'show_render': modifier.show_render}))
+                modifier.strength *= displace
+                modifier.show_viewport = modifier.show_render = bool(displace)
+    report['triangles_after'] = _total_triangles(objects)
+    try:
+        yield report
+    finally:
+        for modifier, values in changed:
+            for attr, value in values.items():
+                setattr(modifier, attr, value)
+
+
+def lod_path(filepath, level):
+    stem, ext = os.path.splitext(filepath)
+    return '%s_LOD%d%s' % (stem, level, ext)
+
+
+@contextmanager
+def lod_copies(objects, level, ratio):
+    """Stage a decimated copy `<name>_LOD<level>` of every mesh in `objects`.
+
+    The copies start from the evaluated mesh (modifiers and arrays applied), keep
+    the original's parent and transform and are tagged as LOD group `level`.
+    Yields (objects to export, triangles); the copies are removed on exit.
+    """
+    staged = []
+    with realized_arrays():
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+        for obj in objects:
+            if obj.type != 'MESH':
+                continue
+            mesh = bpy.data.meshes.new_from_object(obj.evaluated_get(depsgraph))
+            copy = bpy.data.objects.new('%s_LOD%d' % (obj.name, level), mesh)
+            copy[STAGED_PROP] = True
+            for collection in obj.users_collection:
+                collection.objects.link(copy)
+            copy.parent = obj.parent
+            copy.matrix_parent_inverse = obj.matrix_parent_inverse.copy()
+            copy.matrix_basis = obj.matrix_basis.copy()
+            decimate = copy.modifiers.new('LOD', 'DECIMATE')
+            decimate.ratio = ratio
+            staged.append(tag_part(copy, obj.get(ROLE_PROP), obj.get(ASSET_PROP), obj.get(PART_PROP), level))
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    triangles = sum(triangle_count(obj, depsgraph) for obj in staged)
+    try:
+        yield [obj for obj in objects if obj.type != 'MESH'] + staged, triangles
+    finally:
+        bpy.data.batch_remove(set(staged) | {obj.data for obj in staged})
+
+
+def export_lods(filepath, objects, ratios):
+    """Export `objects` decimated to each of `ratios` as <fbx stem>_LOD1.fbx, _LOD2.fbx, ..."""
+    triangles = [_total_triangles(objects)]
+    files = []
+    for level, ratio in enumerate(ratios, 1):
+        with lod_copies(objects, level, ratio) as (lod_objects, lod_triangles):
+            export_fbx(lod_path(filepath, level), objects=lod_objects)
+        triangles.append(lod_triangles)
+        files.append(os.path.basename(lod_path(filepath, level)))
+    return {'ratios': list(ratios), 'triangles': triangles, 'files': files}
+
+
+def _directions(samples):
+    """`samples` unit vectors spread evenly over the sphere (Fibonacci lattice)."""
+    i = np.arange(samples) + 0.5
+    z = 1.0 - 2.0 * i / samples
+    r = np.sqrt(1.0 - z * z)
+    phi = np.pi * (1.0 + 5.0 ** 0.5) * i
+    return np.stack([r * np.cos(phi), r * np.sin(phi), z], axis=1)
+
+
+def _world_faces(obj, mesh):
+    """World-space vertices, face vertex lists, face centers and face normals of `mesh`."""
+    matrix = np.array(world_matrix(obj))
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float64)
+    mesh.vertices.foreach_get('co', co)
+    co = co.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+    centers = np.empty(len(mesh.polygons) * 3, dtype=np.float64)
+    mesh.polygons.foreach_get('center', centers)
+    centers = centers.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+    normals = np.empty(len(mesh.polygons) * 3, dtype=np.float64)
+    mesh.polygons.foreach_get('normal', normals)
+    normals = normals.reshape(-1, 3) @ np.linalg.inv(matrix[:3, :3])
+    normals /= np.maximum(np.linalg.norm(normals, axis=1), 1e-12)[:, None]
+    return co, [tuple(p.vertices) for p in mesh.polygons], centers, normals
+
+
+def see_through(mat):
+    """Whether the parts behind `mat` show through it: a translucent or glowing shell
+    (aura, shield, flame) hides nothing, so cull_hidden_faces() leaves it out."""
+    if mat is None:
+        return False
+    # Blender 4.2+ makes every material 'HASHED'/'DITHERED'; only alpha blending is see-through
+    if hasattr(mat, 'surface_render_method'):
+        blended = mat.surface_render_method == 'BLENDED'
+    else:
+        blended = mat.blend_method == 'BLEND'
+    if _material_color(mat)[3] < 1.0 or blended:
+        return True
+    if not mat.use_nodes:
+        return False
+    for node in mat.node_tree.nodes:
+        if node.type in {'EMISSION', 'BSDF_TRANSPARENT', 'BSDF_TRANSLUCENT'}:
+            return True
+        if node.type == 'BSDF_PRINCIPLED':
+            alpha = node.inputs.get('Alpha')
+            strength = node.inputs.get('Emission Strength')
+            # 'Emission' before Blender 4.0
+            color = node.inputs.get('Emission Color') or node.inputs.get('Emission')
+            if alpha is not None and alpha.default_value < 1.0:
+                return True
+            if strength is not None and color is not None and strength.default_value > 0.0 \
+                    and any(c > 0.0 for c in tuple(color.default_value)[:3]):
+                return True
+    return False
+
+
+def cull_hidden_faces(objects, editable, samples=64):
+    """Delete the faces of the `editable` meshes that no ray from outside the asset reaches.
+
+    The opaque faces of all meshes in `objects` (evaluated) go into one BVHTree
+    and occlude each other; faces with a see-through material (see_through())
+    neither occlude nor get deleted. A face is kept when a ray from one of
+    `samples` directions on its front side, cast from outside the asset's
+    bounding sphere, hits it first: aimed at the face center, or for the faces
+    no center ray reaches, at a point halfway to one of its corners. `editable`
+    must be export-only copies (from merged_by_material()).
+    """
+    verts, polys, faces = [], [], []
+    centers, normals, corners = [], [], []
+    offset = 0
+    with realized_arrays():
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+        for obj in objects:
+            if obj.type != 'MESH':
+                continue
+            mesh = obj.evaluated_get(depsgraph).to_mesh()
+            co, vertex_lists, face_centers, face_normals = _world_faces(obj, mesh)
+            slots = [slot.material for slot in obj.material_slots] or [None]
+            clear = np.array([see_through(mat) for mat in slots])[
+                np.minimum(_material_indices(mesh), len(slots) - 1)]
+            obj.evaluated_get(depsgraph).to_mesh_clear()
+            for index in np.flatnonzero(~clear):
+                if obj in editable:
+                    faces.append((obj, index, len(polys)))
+                    centers.append(face_centers[index])
+                    normals.append(face_normals[index])
+                    corners.append(co[list(vertex_lists[index])])
+                polys.append([offset + i for i in vertex_lists[index]])
+            verts.append(co)
+            offset += len(co)
+    if not faces:
+        return {'samples': samples, 'faces_before': 0, 'faces_removed': 0}
+    verts = np.concatenate(verts)
+    tree = BVHTree.FromPolygons(verts.tolist(), polys)
+    center = verts.mean(axis=0)
+    reach = 2.0 * np.linalg.norm(verts - center, axis=1).max() + 1.0
+    directions = _directions(samples)
+    targets = np.array([face[2] for face in faces])
+    centers = np.array(centers)
+    # the directions that see the front of each face, for all faces at once
+    front = np.array(normals) @ directions.T > 0.0
+
+    reached = _reached(tree, targets, centers, front, directions, reach)
+    for corner in range(max(len(c) for c in corners)):
+        pending = np.flatnonzero(~reached & np.array([len(c) > corner for c in corners]))
+        if not len(pending):
+            break
+        points = np.array([(centers[i] + corners[i][corner]) / 2.0 for i in pending])
+        reached[pending] = _reached(tree, targets[pending], points, front[pending], directions, reach)
+
+    hidden = {}
+    for (obj, index, _), seen in zip(faces, reached):
+        if not seen:
+            hidden.setdefault(obj, []).append(index)
+    for obj, indices in hidden.items():
+        bm = bmesh.new()
+        bm.from_mesh(obj.data)
+        bm.faces.ensure_lookup_table()
+        bmesh.ops.delete(bm, geom=[bm.faces[i] for i in indices], context='FACES')
+        bm.to_mesh(obj.data)
+        bm.free()
+        obj.data.update()
+    return {'samples': samples, 'faces_before': len(faces),
+            'faces_removed': sum(len(indices) for indices in hidden.values()),
+            'removed': {obj.name: len(indices) for obj, indices in hidden.items()}}
+
+
+def _reached(tree, targets, points, front, directions, reach):
+    """Which `points` (one per face, BVH face index in `targets`) a ray from outside hits first.
+
+    Direction by direction, every face not yet reached that has the direction in
+    front of it (`front`, faces x directions) casts one ray; a face stops at its
+    first hit.
+    """
+    reached = np.zeros(len(points), dtype=bool)
+    for column, direction in enumerate(directions):
+        todo = np.flatnonzero(front[:, column] & ~reached)
+        ray = Vector(-direction)
+        for i, origin in zip(todo, (points[todo] + direction * reach).tolist()):
+            location, _, index, _ = tree.ray_cast(Vector(origin), ray, reach + 1.0)
+            # a coplanar face of another part may be hit first at the same spot; both stay
+            if location is not None and (index == targets[i] or (location - Vector(points[i])).length < 1e-4):
+                reached[i] = True
+    return reached
+
+
+def _bisect(faces, centers, triangles, cap):
+    """Split face indices at the triangle median along their longest axis until each part fits `cap`."""
+    if triangles[faces].sum() <= cap or len(faces) < 2:
+        return [faces]
+    points = centers[faces]
+    axis = np.ptp(points, axis=0).argmax()
+    faces = faces[np.argsort(points[:, axis], kind='stable')]
+    running = np.cumsum(triangles[faces])
+    cut = min(max(int(np.searchsorted(running, running[-1] / 2.0)) + 1, 1), len(faces) - 1)
+    return _bisect(faces[:cut], centers, triangles, cap) + _bisect(faces[cut:], centers, triangles, cap)
+
+
+def _split_object(obj, depsgraph, cap):
+    """Copies of `obj` (evaluated) cut into spatially coherent chunks of at most `cap` triangles."""
+    mesh = bpy.data.meshes.new_from_object(obj.evaluated_get(depsgraph))
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('loop_total', loop_totals)
+    centers = np.empty(len(mesh.polygons) * 3, dtype=np.float32)
+    mesh.polygons.foreach_get('center', centers)
+    chunks = _bisect(np.arange(len(mesh.polygons)), centers.reshape(-1, 3), loop_totals - 2, cap)
+    bm = bmesh.new()
+    bm.from_mesh(mesh)
+    copies = []
+    for i, faces in enumerate(chunks):
+        keep = np.zeros(len(mesh.polygons), dtype=bool)
+        keep[faces] = True
+        part = bm.copy()
+        part.faces.ensure_lookup_table()
+        bmesh.ops.delete(part, geom=[face for face in part.faces if not keep[face.index]], context='FACES')
+        chunk = bpy.data.meshes.new('%s_%d' % (obj.name, i))
+        part.to_mesh(chunk)
+        part.free()
+        for mat in mesh.materials:
+            chunk.materials.append(mat)
+        copy = bpy.data.objects.new(chunk.name, chunk)
+        copy[STAGED_PROP] = True
+        for collection in obj.users_collection:
+            collection.objects.link(copy)
+        copy.parent = obj.parent
+        copy.matrix_parent_inverse = obj.matrix_parent_inverse.copy()
+        copy.matrix_basis = obj.matrix_basis.copy()
+        copies.append(copy)
+    bm.free()
+    bpy.data.meshes.remove(mesh)
+    return copies
+
+
+@contextmanager
+def split_oversized(objects, cap=MAX_TRIANGLES):
+    """Replace every mesh in `objects` with more than `cap` triangles (evaluated) by chunks.
+
+    Faces are bisected at the triangle median along the longest axis of their
+    centers, so chunks stay spatially coherent; the chunks keep the materials,
+    parent (the `*Root` pivot) and transform of the mesh they replace. Yields
+    (objects to export, report); the chunks are removed on exit.
+    """
+    staged = []
+    split = {}
+    with realized_arrays():
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+        for obj in objects:
+            if obj.type == 'MESH' and triangle_count(obj, depsgraph) > cap:
+                split[obj] = _split_object(obj, depsgraph, cap)
+                staged += split[obj]
+    exported = []
+    for obj in objects:
+        exported += split.get(obj, [obj])
+    report = {'cap': cap, 'split': sorted(obj.name for obj in split), 'chunks': len(staged)}
+    try:
+        yield exported, report
+    finally:
+        bpy.data.batch_remove(set(staged) | {obj.data for obj in staged})
+
+
+def _root_points(root, meshes, depsgraph):
+    """Evaluated vertices of each mesh in `meshes`, in `root`'s space."""
+    to_root = np.array(world_matrix(root).inverted())
+    points = []
+    for obj in meshes:
+        mesh = obj.evaluated_get(depsgraph).to_mesh()
+        co = np.empty(len(mesh.vertices) * 3, dtype=np.float64)
+        mesh.vertices.foreach_get('co', co)
+        obj.evaluated_get(depsgraph).to_mesh_clear()
+        matrix = to_root @ np.array(world_matrix(obj))
+        if len(co):
+            points.append(co.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3])
+    return points
+
+
+def _clusters(points, max_clusters):
+    """Group point sets: sets whose bounds lie inside another's join it, then the
+    two clusters with the closest centers merge until at most `max_clusters` are left."""
+    bounds = [(p.min(axis=0), p.max(axis=0)) for p in points]
+    order = sorted(range(len(points)), key=lambda i: -np.prod(bounds[i][1] - bounds[i][0]))
+    clusters = []
+    for i in order:
+        low, high = bounds[i]
+        for cluster in clusters:
+            c_low, c_high = cluster['bounds']
+            if np.all(low >= c_low) and np.all(high <= c_high):
+                cluster['points'].append(points[i])
+                break
+        else:
+            clusters.append({'bounds': (low, high), 'points': [points[i]]})
+    clusters = [np.concatenate(cluster['points']) for cluster in clusters]
+    while len(clusters) > max_clusters:
+        centers = np.array([c.mean(axis=0) for c in clusters])
+        distances = np.linalg.norm(centers[:, None] - centers[None], axis=2)
+        np.fill_diagonal(distances, np.inf)
+        a, b = np.unravel_index(distances.argmin(), distances.shape)
+        clusters[a] = np.concatenate([clusters[a], clusters[b]])
+        del clusters[b]
+    return clusters
+
+
+def _add_hull(bm, points, directions):
+    # the extreme point along each direction: a k-DOP-like hull with at most
+    # len(directions) vertices, however dense the part is
+    extremes = points[np.unique((points @ directions.T).argmax(axis=0))]
+    # a flat, straight or single-point cluster (a card, a thin rod) has no volume to
+    # hull: convex_hull() would make no faces, so it gets its (padded) box instead
+    if len(extremes) < 4:
+        _add_box(bm, points)
+        return
+    spread = np.linalg.svd(extremes - extremes.mean(axis=0), compute_uv=False)
+    if spread[2] <= 1e-6 * spread[0]:
+        _add_box(bm, points)
+        return
+    verts = [bm.verts.new(point.tolist()) for point in extremes]
+    hull = bmesh.ops.convex_hull(bm, input=verts)
+    loose = [v for v in hull['geom_interior'] + hull['geom_unused'] if isinstance(v, bmesh.types.BMVert)]
+    bmesh.ops.delete(bm, geom=loose, context='VERTS')
+    if not any(isinstance(elem, bmesh.types.BMFace) for elem in hull['geom']):
+        bmesh.ops.delete(bm, geom=[v for v in verts if v.is_valid], context='VERTS')
+        _add_box(bm, points)
+
+
+def _add_box(bm, points):
+    low, high = points.min(axis=0), points.max(axis=0)
+    matrix = Matrix.Translation(Vector((low + high) / 2.0)) @ Matrix.Diagonal(Vector(np.maximum(high - low, 1e-4)).to_4d())
+    bmesh.ops.create_cube(bm, size=1.0, matrix=matrix)
+
+
+@contextmanager
+def collision_proxies(asset=None, shape='HULL', max_hulls=8, directions=32):
+    """Stage a `<asset>_COL` collision mesh under each `*Root`.
+
+    The root's parts are clustered (parts inside another's bounds join it, then the
+    nearest clusters merge down to `max_hulls`) and each cluster becomes a convex
+    hull of its extreme points along `directions` sample directions (shape='HULL')
+    or its bounding box (shape='BOX'), all in one mesh. Yields (proxies, report);
+    the proxies are removed on exit.
+    """
+    roots = [obj for obj in _export_set(asset) if obj.get(ROLE_PROP) == 'root']
+    sample = _directions(directions)
+    staged = []
+    hulls = 0
+    with realized_arrays():
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+        for root in roots:
+            meshes = _root_meshes(root)
+            points = _root_points(root, meshes, depsgraph)
+            if not points:
+                continue
+            bm = bmesh.new()
+            for cluster in _clusters(points, max_hulls):
+                if shape == 'BOX':
+                    _add_box(bm, cluster)
+                else:
+                    _add_hull(bm, cluster, sample)
+                hulls += 1
+            name = '%s_COL' % _stem(root)
+            mesh = bpy.data.meshes.new(name)
+            bm.to_mesh(mesh)
+            bm.free()
+            proxy = _stage_object(name, mesh, root)
+            proxy.display_type = 'WIRE'
+            staged.append(proxy)
+    report = {'shape': shape, 'hulls': hulls, 'triangles': sum(_mesh_triangles(obj.data) for obj in staged)}
+    try:
+        yield staged, report
+    finally:
+        bpy.data.batch_remove(set(staged) | {obj.data for obj in staged})
+
+
+def report_path(filepath):
+    return os.path.splitext(filepath)[0] + '.report.json'
+
+
+def write_report(filepath, report):
+    with open(report_path(filepath), 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    for name, result in report.items():
+        print('[export_prep] %s: %s' % (name, ', '.join(
+            '%s=%s' % (key, value) for key, value in sorted(result.items()) if not isinstance(value, dict))))
+
+
+def export_asset(filepath, asset=None, kind='tower', name=None, dedupe=True, subsurf=1, displace=1.0,
+                 merge=False, cull=False, cull_samples=32, consolidate=False, voxel_size=0.02,
+                 target_triangles=4000, max_triangles=MAX_TRIANGLES, collision=None, max_hulls=8,
+                 lods=False, budget=True):
+    """Run the export passes on the scene (or on `asset`'s parts) and export the FBX.
+
+    `kind` is the asset class ('enemy' or 'tower') picking the LOD_RATIOS and the
+    default budget; `lods` is True for those ratios, a tuple of ratios of its own,
+    or False (default) for no LOD files. `name` keys budgets.json (default: the FBX file name).
+    `subsurf` and `displace` are the export-time modifier caps of capped_modifiers()
+    (subsurf=None keeps the levels). The remaining passes are opt-in, so a plain
+    export stays close to the scene as built: `merge` exports one mesh per material
+    under each root (merged_by_material()), and with `cull` as well the faces never
+    visible from outside are removed from them (cull_hidden_faces(), `cull_samples` rays).
+    consolidate=True exports one voxel-remeshed, vertex-colored mesh per root instead
+    (consolidated() with `voxel_size` and `target_triangles`); merge and cull are skipped.
+    Meshes over `max_triangles` are exported in chunks (split_oversized(); None: never).
+    `collision` ('HULL', 'BOX' or None, the default) adds a `<asset>_COL` proxy of at most `max_hulls`
+    pieces under each root (collision_proxies()); it is left out of the budget and LODs.
+    Raises BudgetError, before anything is exported, when the asset is over budget
+    and `budget` is on. Returns the report, also written to report_path(filepath).
+    """
+    name = name or os.path.splitext(os.path.basename(filepath))[0]
+    report = {}
+    objects = None
+    with ExitStack() as staging:
+        if dedupe:
+            report['dedupe'] = dedupe_meshes(asset)
+        if subsurf is not None or displace != 1.0:
+            report['caps'] = staging.enter_context(capped_modifiers(_mesh_objects(asset), subsurf, displace))
+        if budget:
+            # per part (after the caps); the totals are checked on what is actually exported
+            built = profile(_export_set(asset))['parts']
+        if consolidate:
+            objects, _, report['consolidate'] = staging.enter_context(
+                consolidated(asset, voxel_size, target_triangles))
+        elif merge:
+            objects, merged, report['merge'] = staging.enter_context(merged_by_material(asset))
+            if cull:
+                report['cull'] = cull_hidden_faces(objects, merged, cull_samples)
+        if max_triangles is not None:
+            objects, report['split'] = staging.enter_context(
+                split_oversized(objects if objects is not None else _export_set(asset), max_triangles))
+        if budget:
+            limits = load_budget(name, kind)
+            exported = profile(objects if objects is not None else _export_set(asset))['total']
+            over = check_budget(exported, limits)
+            report['budget'] = dict(exported, parts=built, limits=limits, over=over)
+            if over:
+                write_report(filepath, report)
+                raise BudgetError('%s is over budget: %s' % (name, ', '.join(over)))
+        proxies = []
+        if collision:
+            objects = objects if objects is not None else _export_set(asset)
+            proxies, report['collision'] = staging.enter_context(collision_proxies(asset, collision, max_hulls))
+        export_fbx(filepath, asset=asset, objects=objects + proxies if proxies else objects)
+        if lods:
+            ratios = LOD_RATIOS[kind] if lods is True else lods
+            report['lod'] = export_lods(filepath, objects or _export_set(asset), ratios)
+    write_report(filepath, report)
+    return report
@@ -1,21 +1,48 @@
 import bpy
-import bmesh
 from mathutils import Vector, Euler
 import math
 
-# ============================================
-# INISIALISASI - Bersihkan scene
-# ============================================
-def clear_scene():
-    bpy.ops.object.select_all(action='SELECT')
-    bpy.ops.object.delete(use_global=False)
-    
-    for material in bpy.data.materials:
-        bpy.data.materials.remove(material)
-    for texture in bpy.data.textures:
-        bpy.data.textures.remove(texture)
-
-clear_scene()
+# Import helpers
+try:
+    from common_utils import (
+        add_empty_at,
+        build_session,
+        build_batch,
+        add_cube,
+        add_cylinder,
+        add_cone,
+        add_uv_sphere,
+        add_torus,
+        shade_smooth,
+        add_subsurf,
+        join_objects,
+        array_objects,
+        arc_array,
+        assign_role_materials,
+        parent_parts,
+        tag_part,
+        from_library,
+        link_rig,
+    )
+except ModuleNotFoundError:
+    if "common_utils.py" in bpy.data.texts:
+        exec(bpy.data.texts["common_utils.py"].as_string(), globals())
+    else:
+        raise
+try:
+    from export_prep import export_asset
+except ModuleNotFoundError:
+    if "export_prep.py" in bpy.data.texts:
+        exec(bpy.data.texts["export_prep.py"].as_string(), globals())
+    else:
+        raise
+try:
+    from mesh_kernels import get_coords, set_coords, height_flare, vertices_above
+except ModuleNotFoundError:
+    if "mesh_kernels.py" in bpy.data.texts:
+        exec(bpy.data.texts["mesh_kernels.py"].as_string(), globals())
+    else:
+        raise
 
 # ============================================
 # FUNGSI HELPER
@@ -32,100 +59,77 @@ def create_material(name):
 # ============================================
 def create_head():
     # Buat kepala oval yang lebih realistis
-    bpy.ops.mesh.primitive_uv_sphere_add(segments=64, ring_count=32, radius=0.5, location=(0, 0, 1.65))
-    head = bpy.context.active_object
-    head.name = "Head"
-    head.scale = (0.88, 1.0, 1.15)
-    
-    bpy.ops.object.shade_smooth()
-    subsurf = head.modifiers.new(name="Subdivision", type='SUBSURF')
-    subsurf.levels = 3
-    subsurf.render_levels = 4
+    head = add_uv_sphere("Head", segments=64, ring_count=32, radius=0.5, location=(0, 0, 1.65),
+                         scale=(0.88, 1.0, 1.15), smooth=True, role="skin")
+    add_subsurf(head, levels=3, render_levels=4)
     
     return head
 
 def create_facial_features():
+    features = []
+    
     # MATA BESAR dengan detail
     for side in [-1, 1]:
         # Eye socket (area gelap di sekitar mata)
-        bpy.ops.mesh.primitive_uv_sphere_add(segments=32, ring_count=16, 
-                                            radius=0.12, 
-                                            location=(side * 0.15, 0.42, 1.72))
-        eye_socket = bpy.context.active_object
-        eye_socket.name = f"EyeSocket_{['L', 'R'][side > 0]}"
-        eye_socket.scale = (1.2, 0.7, 1.0)
-        bpy.ops.object.shade_smooth()
+        eye_socket = add_uv_sphere(f"EyeSocket_{['L', 'R'][side > 0]}",
+                                   segments=32, ring_count=16, 
+                                   radius=0.12, 
+                                   location=(side * 0.15, 0.42, 1.72),
+                                   scale=(1.2, 0.7, 1.0), smooth=True, role="eye_socket")
         
         # Bola mata putih (sclera) - BESAR
-        bpy.ops.mesh.primitive_uv_sphere_add(segments=32, ring_count=16, 
-                                            radius=0.09, 
-                                            location=(side * 0.15, 0.48, 1.72))
-        eyeball = bpy.context.active_object
-        eyeball.name = f"Eyeball_{['L', 'R'][side > 0]}"
-        bpy.ops.object.shade_smooth()
+        eyeball = add_uv_sphere(f"Eyeball_{['L', 'R'][side > 0]}",
+                                segments=32, ring_count=16, 
+                                radius=0.09, 
+                                location=(side * 0.15, 0.48, 1.72), smooth=True, role="eye_white")
         
         # Iris hitam BESAR (seperti di gambar - sangat menonjol)
-        bpy.ops.mesh.primitive_uv_sphere_add(segments=32, ring_count=16, 
-                                            radius=0.06, 
-                                            location=(side * 0.15, 0.52, 1.72))
-        iris = bpy.context.active_object
-        iris.name = f"Iris_{['L', 'R'][side > 0]}"
-        iris.scale = (1.0, 0.4, 1.0)
-        bpy.ops.object.shade_smooth()
+        iris = add_uv_sphere(f"Iris_{['L', 'R'][side > 0]}",
+                             segments=32, ring_count=16, 
+                             radius=0.06, 
+                             location=(side * 0.15, 0.52, 1.72),
+                             scale=(1.0, 0.4, 1.0), smooth=True, role="iris")
         
         # Pupil hitam pekat
-        bpy.ops.mesh.primitive_uv_sphere_add(segments=16, ring_count=8, 
-                                            radius=0.025, 
-                                            location=(side * 0.15, 0.54, 1.72))
-        pupil = bpy.context.active_object
-        pupil.name = f"Pupil_{['L', 'R'][side > 0]}"
-        pupil.scale = (1.0, 0.3, 1.0)
+        pupil = add_uv_sphere(f"Pupil_{['L', 'R'][side > 0]}",
+                              segments=16, ring_count=8, 
+                              radius=0.025, 
+                              location=(side * 0.15, 0.54, 1.72),
+                              scale=(1.0, 0.3, 1.0), role="iris")
+        
+        features += [eye_socket, eyeball, iris, pupil]
     
     # HIDUNG kecil dan mancung
-    bpy.ops.mesh.primitive_cone_add(vertices=16, radius1=0.055, radius2=0.025, 
-                                   depth=0.18, location=(0, 0.48, 1.58))
-    nose = bpy.context.active_object
-    nose.name = "Nose"
-    nose.rotation_euler = (math.radians(95), 0, 0)
-    bpy.ops.object.shade_smooth()
+    nose = add_cone("Nose", vertices=16, radius1=0.055, radius2=0.025, 
+                    depth=0.18, location=(0, 0.48, 1.58),
+                    rotation=(math.radians(95), 0, 0), smooth=True, role="skin")
+    features.append(nose)
     
     # MULUT - tersenyum menyeramkan dengan gigi terlihat
-    bpy.ops.mesh.primitive_torus_add(major_radius=0.15, minor_radius=0.04, 
-                                    location=(0, 0.46, 1.44))
-    mouth = bpy.context.active_object
-    mouth.name = "Mouth"
-    mouth.scale = (1.3, 0.5, 0.6)
-    mouth.rotation_euler = (math.radians(90), 0, 0)
-    bpy.ops.object.shade_smooth()
+    mouth = add_torus("Mouth", major_radius=0.15, minor_radius=0.04, 
+                      location=(0, 0.46, 1.44),
+                      rotation=(math.radians(90), 0, 0),
+                      scale=(1.3, 0.5, 0.6), smooth=True, role="mouth")
+    features.append(mouth)
     
     # GIGI - Deretan gigi atas
+    # (10 gigi berbagi satu mesh, posisinya dihitung sekaligus di sepanjang busur mulut)
     teeth_count = 10
-    for i in range(teeth_count):
-        angle = (i - teeth_count/2) * 0.055
-        x_pos = math.sin(angle) * 0.17
-        y_pos = 0.46 + math.cos(angle) * 0.025
-        z_pos = 1.455
-        
-        bpy.ops.mesh.primitive_cube_add(size=0.018, location=(x_pos, y_pos, z_pos))
-        tooth = bpy.context.active_object
-        tooth.name = f"Tooth_{i}"
-        tooth.scale = (1.0, 0.6, 1.4)
-        tooth.rotation_euler = (0, 0, angle * 0.5)
-        bpy.ops.object.shade_smooth()
+    tooth = add_cube("Tooth", size=0.018, scale=(1.0, 0.6, 1.4), smooth=True, role="teeth")
+    teeth = array_objects(tooth, arc_array(teeth_count, radius=(0.17, 0.025), center=(0, 0.46, 1.455),
+                                           start_angle=-teeth_count / 2 * 0.055, step=0.055, twist=0.5))
+    features.extend(teeth)
+    
+    return features
 
 # ============================================
 # MODELING - Leher
 # ============================================
 def create_neck():
-    bpy.ops.mesh.primitive_cylinder_add(vertices=32, radius=0.2, depth=0.4, 
-                                       location=(0, 0, 1.2))
-    neck = bpy.context.active_object
-    neck.name = "Neck"
-    neck.scale = (0.95, 0.85, 1.0)
-    bpy.ops.object.shade_smooth()
+    neck = add_cylinder("Neck", vertices=32, radius=0.2, depth=0.4, 
+                        location=(0, 0, 1.2), scale=(0.95, 0.85, 1.0), smooth=True, role="skin")
     
-    subsurf = neck.modifiers.new(name="Subdivision", type='SUBSURF')
-    subsurf.levels = 2
+    add_subsurf(neck, levels=2)
     
     return neck
 
@@ -134,15 +138,10 @@ def create_neck():
 # ============================================
 def create_torso():
     # Torso atas (dada)
-    bpy.ops.mesh.primitive_cylinder_add(vertices=32, radius=0.38, depth=0.65, 
-                                       location=(0, 0, 0.7))
-    torso = bpy.context.active_object
-    torso.name = "Torso"
-    torso.scale = (1.0, 0.65, 1.0)
+    torso = add_cylinder("Torso", vertices=32, radius=0.38, depth=0.65, 
+                         location=(0, 0, 0.7), scale=(1.0, 0.65, 1.0), smooth=True, role="skin")
     
-    bpy.ops.object.shade_smooth()
-    subsurf = torso.modifiers.new(name="Subdivision", type='SUBSURF')
-    subsurf.levels = 2
+    add_subsurf(torso, levels=2)
     
     return torso
 
@@ -154,51 +153,38 @@ def create_arms():
     
     for side in [-1, 1]:
         # Bahu
-        bpy.ops.mesh.primitive_uv_sphere_add(segments=16, ring_count=12, 
-                                            radius=0.14, 
-                                            location=(side * 0.42, 0, 0.9))
-        shoulder = bpy.context.active_object
-        shoulder.name = f"Shoulder_{['L', 'R'][side > 0]}"
-        shoulder.scale = (1.2, 0.9, 1.0)
-        bpy.ops.object.shade_smooth()
+        shoulder = add_uv_sphere(f"Shoulder_{['L', 'R'][side > 0]}",
+                                 segments=16, ring_count=12, 
+                                 radius=0.14, 
+                                 location=(side * 0.42, 0, 0.9),
+                                 scale=(1.2, 0.9, 1.0), smooth=True, role="skin")
         arms.append(shoulder)
         
         # Upper arm (lengan atas)
-        bpy.ops.mesh.primitive_cylinder_add(vertices=24, radius=0.095, depth=0.55, 
-                                           location=(side * 0.52, 0, 0.55))
-        upper_arm = bpy.context.active_object
-        upper_arm.name = f"UpperArm_{['L', 'R'][side > 0]}"
-        upper_arm.rotation_euler = (0, side * 0.12, 0)
-        upper_arm.scale = (1.0, 1.0, 1.0)
-        bpy.ops.object.shade_smooth()
+        upper_arm = add_cylinder(f"UpperArm_{['L', 'R'][side > 0]}",
+                                 vertices=24, radius=0.095, depth=0.55, 
+                                 location=(side * 0.52, 0, 0.55),
+                                 rotation=(0, side * 0.12, 0), smooth=True, role="skin")
         arms.append(upper_arm)
         
         # Elbow (siku)
-        bpy.ops.mesh.primitive_uv_sphere_add(segments=16, ring_count=12, 
-                                            radius=0.085, 
-                                            location=(side * 0.58, 0, 0.25))
-        elbow = bpy.context.active_object
-        elbow.name = f"Elbow_{['L', 'R'][side > 0]}"
-        bpy.ops.object.shade_smooth()
+        elbow = add_uv_sphere(f"Elbow_{['L', 'R'][side > 0]}",
+                              segments=16, ring_count=12, 
+                              radius=0.085, 
+                              location=(side * 0.58, 0, 0.25), smooth=True, role="skin")
         arms.append(elbow)
         
         # Lower arm (lengan bawah)
-        bpy.ops.mesh.primitive_cylinder_add(vertices=24, radius=0.08, depth=0.5, 
-                                           location=(side * 0.64, 0, -0.05))
-        lower_arm = bpy.context.active_object
-        lower_arm.name = f"LowerArm_{['L', 'R'][side > 0]}"
-        lower_arm.rotation_euler = (0, side * 0.08, 0)
-        bpy.ops.object.shade_smooth()
+        lower_arm = add_cylinder(f"LowerArm_{['L', 'R'][side > 0]}",
+                                 vertices=24, radius=0.08, depth=0.5, 
+                                 location=(side * 0.64, 0, -0.05),
+                                 rotation=(0, side * 0.08, 0), smooth=True, role="skin")
         arms.append(lower_arm)
         
         # Hand (tangan)
-        bpy.ops.mesh.primitive_cube_add(size=0.16, location=(side * 0.68, 0, -0.32))
-        hand = bpy.context.active_object
-        hand.name = f"Hand_{['L', 'R'][side > 0]}"
-        hand.scale = (0.85, 0.55, 1.3)
-        subsurf = hand.modifiers.new(name="Subdivision", type='SUBSURF')
-        subsurf.levels = 2
-        bpy.ops.object.shade_smooth()
+        hand = add_cube(f"Hand_{['L', 'R'][side > 0]}", size=0.16, location=(side * 0.68, 0, -0.32),
+                        scale=(0.85, 0.55, 1.3), smooth=True, role="skin")
+        add_subsurf(hand, levels=2)
         arms.append(hand)
     
     return arms
@@ -208,59 +194,29 @@ def create_arms():
 # ============================================
 def create_dress():
     # Gaun bagian atas (bodice) - fitted
-    bpy.ops.mesh.primitive_cylinder_add(vertices=64, radius=0.42, depth=0.7, 
-                                       location=(0, 0, 0.65))
-    dress_top = bpy.context.active_object
-    dress_top.name = "Dress_Top"
-    dress_top.scale = (0.95, 0.7, 1.0)
+    dress_top = add_cylinder("Dress_Top", vertices=64, radius=0.42, depth=0.7, 
+                             location=(0, 0, 0.65), scale=(0.95, 0.7, 1.0))
     
     # Gaun bagian tengah
-    bpy.ops.mesh.primitive_cylinder_add(vertices=64, radius=0.48, depth=0.8, 
-                                       location=(0, 0, -0.1))
-    dress_mid = bpy.context.active_object
-    dress_mid.name = "Dress_Mid"
-    dress_mid.scale = (1.0, 0.75, 1.0)
+    dress_mid = add_cylinder("Dress_Mid", vertices=64, radius=0.48, depth=0.8, 
+                             location=(0, 0, -0.1), scale=(1.0, 0.75, 1.0))
     
     # Gaun bagian bawah (skirt panjang menyentuh tanah)
-    bpy.ops.mesh.primitive_cylinder_add(vertices=64, radius=0.5, depth=2.0, 
-                                       location=(0, 0, -1.2))
-    dress_bottom = bpy.context.active_object
-    dress_bottom.name = "Dress_Bottom"
-    
-    # Edit bottom untuk flare
-    bpy.ops.object.mode_set(mode='EDIT')
-    bpy.ops.mesh.select_all(action='DESELECT')
-    bm = bmesh.from_edit_mesh(dress_bottom.data)
-    
-    for v in bm.verts:
-        if v.co.z < -1.5:
-            v.select = True
-            v.co.x *= 2.2
-            v.co.y *= 2.2
-        elif v.co.z < -0.5:
-            factor = 1.0 + ((-0.5 - v.co.z) / 1.0) * 1.2
-            v.co.x *= factor
-            v.co.y *= factor
-    
-    bmesh.update_edit_mesh(dress_bottom.data)
-    bpy.ops.object.mode_set(mode='OBJECT')
-    
-    # Join semua bagian gaun
-    bpy.ops.object.select_all(action='DESELECT')
-    dress_top.select_set(True)
-    dress_mid.select_set(True)
-    dress_bottom.select_set(True)
-    bpy.context.view_layer.objects.active = dress_top
-    bpy.ops.object.join()
-    
-    dress = bpy.context.active_object
-    dress.name = "Dress"
-    bpy.ops.object.shade_smooth()
+    dress_bottom = add_cylinder("Dress_Bottom", vertices=64, radius=0.5, depth=2.0, 
+                                location=(0, 0, -1.2))
+    
+    # Edit bottom untuk flare: melebar ke bawah mulai z < -0.5, ujung (z < -1.5) x2.2
+    co = get_coords(dress_bottom.data)
+    height_flare(co, start=-0.5, span=1.0, gain=1.2, floor=-1.5, floor_factor=2.2)
+    set_coords(dress_bottom.data, co)
+    
+    # Join semua bagian gaun (langsung di level mesh data, tanpa seleksi)
+    dress = join_objects([dress_top, dress_mid, dress_bottom], name="Dress")
+    tag_part(dress, role="dress", part="Dress")
+    shade_smooth(dress)
     
     # Subdivision untuk smooth surface
-    subsurf = dress.modifiers.new(name="Subdivision", type='SUBSURF')
-    subsurf.levels = 2
-    subsurf.render_levels = 3
+    add_subsurf(dress, levels=2, render_levels=3)
     
     # Displacement untuk lipatan kain yang natural
     displace = dress.modifiers.new(name="Displacement", type='DISPLACE')
@@ -273,18 +229,17 @@ def create_dress():
     displace.texture = tex
     
     # Tambahkan lengan gaun
+    sleeves = []
     for side in [-1, 1]:
-        bpy.ops.mesh.primitive_cylinder_add(vertices=32, radius=0.11, depth=0.6, 
-                                           location=(side * 0.52, 0, 0.55))
-        sleeve = bpy.context.active_object
-        sleeve.name = f"Sleeve_{['L', 'R'][side > 0]}"
-        sleeve.rotation_euler = (0, side * 0.12, 0)
-        bpy.ops.object.shade_smooth()
+        sleeve = add_cylinder(f"Sleeve_{['L', 'R'][side > 0]}",
+                              vertices=32, radius=0.11, depth=0.6, 
+                              location=(side * 0.52, 0, 0.55),
+                              rotation=(0, side * 0.12, 0), smooth=True, role="dress")
         
-        subsurf_sleeve = sleeve.modifiers.new(name="Subdivision", type='SUBSURF')
-        subsurf_sleeve.levels = 2
+        add_subsurf(sleeve, levels=2)
+        sleeves.append(sleeve)
     
-    return dress
+    return dress, sleeves
 
 # ============================================
 # MATERIAL - Kulit Abu-abu Pucat (Fixed)
@@ -480,8 +435,11 @@ def create_dress_material():
     noise1.inputs['Scale'].default_value = 8.0
     noise1.inputs['Detail'].default_value = 8.0
     
-    # Musgrave untuk tekstur kain
-    musgrave = nodes.new(type='ShaderNodeTexMusgrave')
+    # Musgrave untuk tekstur kain (Blender 4.1+ menggabungkan Musgrave ke Noise Texture)
+    if hasattr(bpy.types, 'ShaderNodeTexMusgrave'):
+        musgrave = nodes.new(type='ShaderNodeTexMusgrave')
+    else:
+        musgrave = nodes.new(type='ShaderNodeTexNoise')
     musgrave.location = (-600, -250)
     musgrave.inputs['Scale'].default_value = 25.0
     musgrave.inputs['Detail'].default_value = 12.0
@@ -521,19 +479,13 @@ def create_dress_material():
 # HAIR SYSTEM - Rambut Hitam Panjang Lebat
 # ============================================
 def create_hair_system(head):
-    bpy.context.view_layer.objects.active = head
-    head.select_set(True)
-    
     # Buat vertex group untuk emission area (seluruh kepala)
     vg = head.vertex_groups.new(name="Hair_Emit")
-    vertices = []
-    for v in head.data.vertices:
-        if v.co.z > 1.3:  # Area kepala
-            vertices.append(v.index)
-    vg.add(vertices, 1.0, 'ADD')
-    
-    # Tambahkan particle system
-    bpy.ops.object.particle_system_add()
+    vertices = vertices_above(get_coords(head.data), 1.3)  # Area kepala
+    vg.add(vertices.tolist(), 1.0, 'ADD')
+    
+    # Tambahkan particle system (lewat modifier, tanpa operator/active object)
+    head.modifiers.new(name="Hair", type='PARTICLE_SYSTEM')
     psys = head.particle_systems[-1]
     settings = psys.settings
     
@@ -548,7 +500,11 @@ def create_hair_system(head):
     
     # Child particles untuk volume
     settings.child_type = 'INTERPOLATED'
-    settings.child_nbr = 15
+    # Blender 4.x mengganti nama child_nbr menjadi child_percent
+    if hasattr(settings, "child_percent"):
+        settings.child_percent = 15
+    else:
+        settings.child_nbr = 15
     settings.rendered_child_count = 15
     
     # Clumping - rambut menggumpal natural
@@ -584,8 +540,11 @@ def create_hair_material():
     hair_bsdf = nodes.new(type='ShaderNodeBsdfHairPrincipled')
     hair_bsdf.location = (200, 0)
     hair_bsdf.inputs['Color'].default_value = (0.015, 0.015, 0.015, 1.0)
-    hair_bsdf.inputs['Melanin'].default_value = 1.0
-    hair_bsdf.inputs['Melanin Redness'].default_value = 0.0
+    # Blender 4.x menyembunyikan socket Melanin di parametrization COLOR (tidak dipakai di sini)
+    for name, value in (("Melanin", 1.0), ("Melanin Redness", 0.0)):
+        socket = hair_bsdf.inputs.get(name)
+        if socket is not None:
+            socket.default_value = value
     hair_bsdf.inputs['Roughness'].default_value = 0.45
     hair_bsdf.inputs['Radial Roughness'].default_value = 0.35
     hair_bsdf.inputs['Coat'].default_value = 0.15
@@ -667,107 +626,111 @@ def setup_render():
 # ============================================
 # MAIN EXECUTION
 # ============================================
-print("=== Membuat Model Kuntilanak (Sesuai Gambar) ===\n")
-
-# 1. Kepala
-print("1. Membuat kepala...")
-head = create_head()
-
-# 2. Facial features
-print("2. Menambahkan wajah detail...")
-create_facial_features()
-
-# 3. Leher
-print("3. Membuat leher...")
-neck = create_neck()
-
-# 4. Torso
-print("4. Membuat torso...")
-torso = create_torso()
-
-# 5. Lengan
-print("5. Membuat lengan...")
-arms = create_arms()
-
-# 6. Gaun
-print("6. Membuat gaun panjang...")
-dress = create_dress()
-
-# 7. Materials
-print("7. Menerapkan material...")
-skin_mat = create_skin_material()
-eye_socket_mat = create_eye_socket_material()
-eye_white_mat = create_eye_white_material()
-iris_mat = create_iris_material()
-mouth_mat = create_mouth_material()
-teeth_mat = create_teeth_material()
-dress_mat = create_dress_material()
-
-# Apply materials
-head.data.materials.append(skin_mat)
-neck.data.materials.append(skin_mat)
-torso.data.materials.append(skin_mat)
-
-for arm in arms:
-    if len(arm.data.materials) == 0:
-        arm.data.materials.append(skin_mat)
-
-for obj in bpy.data.objects:
-    if "EyeSocket_" in obj.name:
-        obj.data.materials.append(eye_socket_mat)
-    elif "Eyeball_" in obj.name:
-        obj.data.materials.append(eye_white_mat)
-    elif "Iris_" in obj.name or "Pupil_" in obj.name:
-        obj.data.materials.append(iris_mat)
-    elif obj.name == "Mouth":
-        obj.data.materials.append(mouth_mat)
-    elif "Tooth_" in obj.name:
-        obj.data.materials.append(teeth_mat)
-    elif obj.name == "Nose":
-        if len(obj.data.materials) == 0:
-            obj.data.materials.append(skin_mat)
-
-dress.data.materials.append(dress_mat)
-
-# Apply dress material to sleeves
-for obj in bpy.data.objects:
-    if "Sleeve_" in obj.name:
-        obj.data.materials.append(dress_mat)
-
-# 8. Hair system
-print("8. Membuat sistem rambut (ini memakan waktu)...")
-hair_psys = create_hair_system(head)
-hair_mat = create_hair_material()
-
-# Add hair material to head
-head.data.materials.append(hair_mat)
-
-# Set material slot untuk particle
-for i, mat in enumerate(head.data.materials):
-    if mat.name == "Hair_Black":
-        hair_psys.settings.material = len(head.data.materials)
-        hair_psys.settings.material_slot = mat.name
-        break
-
-# 9. Lighting
-print("9. Setup pencahayaan...")
-create_lighting()
-
-# 10. Camera
-print("10. Setup kamera...")
-setup_camera()
-
-# 11. World
-print("11. Setup world...")
-setup_world()
-
-# 12. Render
-print("12. Konfigurasi render...")
-setup_render()
-print("\n=== MODEL KUNTILANAK SELESAI ===")
-print("✓ Wajah pucat dengan mata besar hitam")
-print("✓ Rambut hitam panjang lebat")
-print("✓ Gaun putih kotor panjang")
-print("✓ Pose A-pose depan")
-print("\nTekan F12 untuk render!")
-print("Jika rambut tidak muncul, pastikan Particle Hair diaktifkan di Viewport Shading.")
\ No newline at end of file
+def build_kuntilanak():
+    print("=== Membuat Model Kuntilanak (Sesuai Gambar) ===\n")
+    
+    # Part dibangun di collection yang belum di-link ke scene,
+    # scene di-update sekali saja setelah blok ini selesai
+    with build_batch("Kuntilanak"):
+        # 1. Kepala
+        print("1. Membuat kepala...")
+        head = create_head()
+        
+        # 2. Facial features
+        print("2. Menambahkan wajah detail...")
+        features = create_facial_features()
+        
+        # 3. Leher
+        print("3. Membuat leher...")
+        neck = create_neck()
+        
+        # 4. Torso
+        print("4. Membuat torso...")
+        torso = create_torso()
+        
+        # 5. Lengan
+        print("5. Membuat lengan...")
+        arms = create_arms()
+        
+        # 6. Gaun
+        print("6. Membuat gaun panjang...")
+        dress, sleeves = create_dress()
+        
+        # Root untuk pivot di Roblox
+        root = add_empty_at("KuntilanakRoot", (0, 0, 0))
+    
+    # 7. Materials
+    print("7. Menerapkan material...")
+    # Pakai material dari library.blend kalau ada, kalau tidak dibuat di sini
+    skin_mat = from_library('materials', "Skin_Pale") or create_skin_material()
+    eye_socket_mat = from_library('materials', "Eye_Socket_Dark") or create_eye_socket_material()
+    eye_white_mat = from_library('materials', "Eye_White") or create_eye_white_material()
+    iris_mat = from_library('materials', "Iris_Black") or create_iris_material()
+    mouth_mat = from_library('materials', "Mouth_Dark") or create_mouth_material()
+    teeth_mat = from_library('materials', "Teeth_White") or create_teeth_material()
+    dress_mat = from_library('materials', "Dress_Dirty") or create_dress_material()
+    
+    # Apply materials lewat role yang di-tag saat part dibuat
+    # (hanya part Kuntilanak yang diperiksa, bukan semua objek di file)
+    assign_role_materials("Kuntilanak", {
+        "skin": skin_mat,
+        "eye_socket": eye_socket_mat,
+        "eye_white": eye_white_mat,
+        "iris": iris_mat,
+        "mouth": mouth_mat,
+        "teeth": teeth_mat,
+        "dress": dress_mat,
+    })
+    
+    # 8. Hair system
+    print("8. Membuat sistem rambut (ini memakan waktu)...")
+    hair_psys = create_hair_system(head)
+    hair_mat = from_library('materials', "Hair_Black") or create_hair_material()
+    
+    # Add hair material to head
+    head.data.materials.append(hair_mat)
+    
+    # Set material slot untuk particle
+    for i, mat in enumerate(head.data.materials):
+        if mat.name == "Hair_Black":
+            # indeks slot mulai dari 1; material_slot (enum dari objek aktif) tidak
+            # bisa di-set saat tidak ada objek aktif, mis. di --background
+            hair_psys.settings.material = i + 1
+            break
+    
+    # Parent semua part ke root
+    parent_parts("Kuntilanak", root)
+    
+    # 9-10. Lighting & camera: rig studio dari library.blend, atau dibuat ulang kalau belum ada
+    print("9. Setup pencahayaan & kamera...")
+    if not link_rig("Rig_Kuntilanak"):
+        create_lighting()
+        setup_camera()
+    
+    # 11. World
+    print("11. Setup world...")
+    setup_world()
+    
+    # 12. Render
+    print("12. Konfigurasi render...")
+    setup_render()
+    print("\n=== MODEL KUNTILANAK SELESAI ===")
+    print("✓ Wajah pucat dengan mata besar hitam")
+    print("✓ Rambut hitam panjang lebat")
+    print("✓ Gaun putih kotor panjang")
+    print("✓ Pose A-pose depan")
+    print("\nTekan F12 untuk render!")
+    print("Jika rambut tidak muncul, pastikan Particle Hair diaktifkan di Viewport Shading.")
+    
+    return root
+
+def main(filepath_fbx=None, **export_options):
+    # build_session() menghapus semua data dari build sebelumnya
+    # (termasuk tekstur Cloth_Wrinkles dan particle settings rambut)
+    with build_session():
+        build_kuntilanak()
+        if filepath_fbx:
+            export_asset(filepath_fbx, kind="enemy", **export_options)
+
+if __name__ == "__main__":
+    main(filepath_fbx=None)
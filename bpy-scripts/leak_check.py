@@ -0,0 +1,101 @@
+# Leak check: run every asset's main() many times in one Blender process and
+# verify that datablock counts and resident memory stay flat, first building only,
+# then exporting to a temporary directory with every export pass on (the 'release'
+# preset: staged merges, culling, collision proxies, LOD files).
+# Run inside Blender:
+#   blender --background --factory-startup --python-exit-code 1 --python bpy-scripts/leak_check.py -- [asset ...] [--runs 200] [--export-runs 20]
+# Exits with status 1 (through --python-exit-code) when an asset leaks.
+import argparse
+import importlib
+import os
+import sys
+import tempfile
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import bpy
+
+import common_utils
+from assets import ASSETS, EXPORT_PRESETS
+
+
+def datablock_counts():
+    return {attr: len(getattr(bpy.data, attr)) for attr in common_utils.SESSION_DATA}
+
+
+def rss_mb():
+    """Resident set size in MiB (Linux), or None where /proc is not available."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE') / (1024.0 * 1024.0)
+
+
+def check_asset(name, runs, warmup, rss_slack, export_dir=None):
+    """Run main() `runs` times, exporting into `export_dir` when given; return a list
+    of problems (empty when flat)."""
+    module = importlib.import_module(ASSETS[name].module)
+    filepath_fbx = os.path.join(export_dir, ASSETS[name].fbx) if export_dir else None
+    options = EXPORT_PRESETS['release'] if export_dir else {}
+    counts = []
+    rss = []
+    for _ in range(runs):
+        module.main(filepath_fbx=filepath_fbx, **options)
+        counts.append(datablock_counts())
+        rss.append(rss_mb())
+
+    problems = []
+    # the first runs may link library data or fill caches
+    baseline = counts[warmup - 1]
+    for attr in common_utils.SESSION_DATA:
+        grown = [c[attr] for c in counts[warmup:] if c[attr] != baseline[attr]]
+        if grown:
+            problems.append('%s: %d after run %d, %d after run %d'
+                            % (attr, baseline[attr], warmup, counts[-1][attr], runs))
+    if rss[-1] is not None and rss[-1] - rss[warmup - 1] > rss_slack:
+        problems.append('RSS: %.1f MiB after run %d, %.1f MiB after run %d'
+                        % (rss[warmup - 1], warmup, rss[-1], runs))
+    return problems
+
+
+def main():
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    parser = argparse.ArgumentParser(prog='leak_check.py')
+    parser.add_argument('assets', nargs='*', metavar='asset')
+    parser.add_argument('--runs', type=int, default=200)
+    parser.add_argument('--export-runs', type=int, default=20,
+                        help='runs that also export every pass (0: build only)')
+    parser.add_argument('--warmup', type=int, default=3, help='runs before the baseline is taken')
+    parser.add_argument('--rss-slack', type=float, default=32.0,
+                        help='allowed RSS growth after warmup, in MiB (allocator noise)')
+    args = parser.parse_args(argv)
+    unknown = sorted(set(args.assets) - set(ASSETS))
+    if unknown:
+        parser.error('unknown asset(s): %s' % ', '.join(unknown))
+    if not 0 < args.warmup < args.runs or args.export_runs and not args.warmup < args.export_runs:
+        parser.error('need 0 < --warmup < --runs (and < --export-runs unless it is 0)')
+
+    failed = []
+    with tempfile.TemporaryDirectory(prefix='leak_check_') as export_dir:
+        for name in args.assets or list(ASSETS):
+            problems = check_asset(name, args.runs, args.warmup, args.rss_slack)
+            if args.export_runs:
+                problems += ['export: ' + problem for problem in
+                             check_asset(name, args.export_runs, args.warmup, args.rss_slack, export_dir)]
+            print('%-12s %s' % (name, 'ok' if not problems else 'LEAK'))
+            for problem in problems:
+                print('    ' + problem)
+            if problems:
+                failed.append(name)
+    common_utils.reset_scene()
+    if failed:
+        print('leaking: %s' % ', '.join(failed))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# Generate bpy-scripts/library.blend: the canonical materials, studio rigs and node groups
+# Run inside Blender (again whenever a material, rig or spec changes):
+#   blender --background --factory-startup --python bpy-scripts/make_library.py
+# Builders link what they need from it through common_utils.from_library()/link_rig()
+# and fall back to building it themselves when the file or a datablock is missing.
+import glob
+import os
+import sys
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import bpy
+
+import common_utils
+import kuntilanak
+import tuyul
+
+TUYUL_MATERIALS = [
+    tuyul.create_skin_material, tuyul.create_eye_white_material, tuyul.create_pupil_material,
+    tuyul.create_mouth_material, tuyul.create_pants_material, tuyul.create_ear_material,
+]
+KUNTILANAK_MATERIALS = [
+    kuntilanak.create_skin_material, kuntilanak.create_eye_socket_material, kuntilanak.create_eye_white_material,
+    kuntilanak.create_iris_material, kuntilanak.create_mouth_material, kuntilanak.create_teeth_material,
+    kuntilanak.create_dress_material, kuntilanak.create_hair_material,
+]
+# collection name -> functions that add its lights and camera
+RIGS = {
+    'Rig_Tuyul': [tuyul.setup_lighting, tuyul.setup_camera],
+    'Rig_Kuntilanak': [kuntilanak.create_lighting, kuntilanak.setup_camera],
+}
+
+
+def spec_materials():
+    # by name, not through make_material(): every spec material is in the library even
+    # when another one (of this or another spec) has the same look
+    materials = []
+    for path in sorted(glob.glob(os.path.join(common_utils.SPECS_DIR, '*.json'))):
+        spec = common_utils.load_spec(os.path.splitext(os.path.basename(path))[0])
+        for name, params in spec['materials'].items():
+            materials.append(common_utils.new_material(name, **params))
+    return materials
+
+
+def studio_rig(name, setups):
+    """Run the rig's setup functions and move the objects they add into collection `name`."""
+    before = set(bpy.data.objects)
+    for setup in setups:
+        setup()
+    rig = bpy.data.collections.new(name)
+    for obj in set(bpy.data.objects) - before:
+        for collection in list(obj.users_collection):
+            collection.objects.unlink(obj)
+        rig.objects.link(obj)
+    return rig
+
+
+def main():
+    # build everything from code, never from the library being replaced
+    common_utils.USE_LIBRARY = False
+    common_utils.reset_scene()
+    blocks = set(spec_materials())
+    blocks.update(create() for create in TUYUL_MATERIALS + KUNTILANAK_MATERIALS)
+    blocks.update(studio_rig(name, setups) for name, setups in RIGS.items())
+    blocks.update([common_utils.array_group(), common_utils.realize_group()])
+    bpy.data.libraries.write(common_utils.LIBRARY_PATH, blocks, fake_user=True)
+    print('[make_library] %d datablocks -> %s' % (len(blocks), common_utils.LIBRARY_PATH))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# Vectorized vertex deformation kernels (NumPy ships with Blender)
+# Coordinates are read once with get_coords(), deformed as an (N, 3) array and
+# written back with set_coords(), instead of looping over bm.verts in Python.
+# All coordinates are in the mesh's local space, like bmesh vertex coordinates.
+import numpy as np
+
+
+def get_coords(mesh):
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', co)
+    return co.reshape(-1, 3)
+
+
+def set_coords(mesh, co):
+    mesh.vertices.foreach_set('co', np.ascontiguousarray(co, dtype=np.float32).ravel())
+    mesh.update()
+
+
+def height_mask(co, z_min=-np.inf, z_max=np.inf):
+    """Boolean mask of vertices with z_min < z < z_max."""
+    z = co[:, 2]
+    return (z > z_min) & (z < z_max)
+
+
+def axis_scale(co, factors, mask=None):
+    """Multiply X/Y/Z by `factors` (x, y, z), optionally only where `mask` is True."""
+    factors = np.asarray(factors, dtype=co.dtype)
+    if mask is None:
+        co *= factors
+    else:
+        co[mask] *= factors
+    return co
+
+
+def radial_scale(co, factor, mask=None):
+    """Scale X and Y (around the Z axis) by `factor`, a scalar or one value per vertex."""
+    factor = np.asarray(factor, dtype=co.dtype)
+    if factor.ndim:
+        factor = factor[:, None]
+    if mask is None:
+        co[:, :2] *= factor
+    else:
+        co[mask, :2] *= factor[mask] if factor.ndim else factor
+    return co
+
+
+def height_flare(co, start, span, gain, floor=None, floor_factor=None):
+    """Flare X/Y outwards below height `start`, like a skirt.
+
+    The radial factor grows linearly: 1 + (start - z) / span * gain. Vertices
+    below `floor` get `floor_factor` instead, when both are given.
+    """
+    z = co[:, 2]
+    factor = np.ones(len(co), dtype=co.dtype)
+    below = z < start
+    factor[below] = 1.0 + (start - z[below]) / span * gain
+    if floor is not None and floor_factor is not None:
+        factor[z < floor] = floor_factor
+    return radial_scale(co, factor)
+
+
+def vertices_above(co, z):
+    """Indices of vertices higher than `z`, e.g. for VertexGroup.add()."""
+    return np.flatnonzero(co[:, 2] > z)
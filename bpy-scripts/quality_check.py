@@ -0,0 +1,97 @@
+# Quality check: verify the tessellation profiles (common_utils.QUALITY_PROFILES).
+#   - every profile gives a different build key (build_cache.build_key)
+#   - no profile touches the low-poly segment counts of a spec (<= SEGMENT_SCALE_MIN)
+#   - each asset built at the export profile stays at or under its 'hero' baseline
+# Run inside Blender:
+#   blender --background --factory-startup --python-exit-code 1 --python bpy-scripts/quality_check.py -- [asset ...]
+# Exits with status 1 (through --python-exit-code) when a check fails.
+import argparse
+import importlib
+import os
+import sys
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import bpy
+
+import common_utils
+from assets import ASSETS, EXPORT_QUALITY, QUALITIES
+from build_cache import build_key, spec_path
+from export_prep import profile
+
+
+def check_keys(name):
+    keys = {build_key(name, bpy.app.version, {'quality': q}) for q in QUALITIES}
+    if len(keys) != len(QUALITIES):
+        return ['build key does not change with the quality profile']
+    return []
+
+
+def check_spec(name):
+    """Problems with the segment counts the profiles give the parts of spec `name`."""
+    if not os.path.isfile(spec_path(name)):
+        return []
+    spec = common_utils.load_spec(name)
+    problems = []
+    for quality in QUALITIES:
+        common_utils.QUALITY = quality
+        for part in spec['parts']:
+            params = part.get('params', {})
+            for key, value in common_utils.tessellate(params).items():
+                if key not in common_utils.SEGMENT_PARAMS:
+                    continue
+                authored = params[key]
+                # low counts stay as authored, higher ones shrink but not below the floor
+                lowest = min(authored, common_utils.SEGMENT_SCALE_MIN)
+                if authored <= common_utils.SEGMENT_SCALE_MIN and value != authored or not lowest <= value <= authored:
+                    problems.append('%s %s.%s: %d -> %d' % (quality, part['name'], key, authored, value))
+    return problems
+
+
+def built_total(name, quality):
+    common_utils.QUALITY = quality
+    importlib.import_module(ASSETS[name].module).main(filepath_fbx=None)
+    return profile([obj for obj in bpy.data.objects if obj.type == 'MESH'])['total']
+
+
+def check_baseline(name):
+    """Build `name` at 'hero' and at EXPORT_QUALITY and compare the totals."""
+    hero = built_total(name, 'hero')
+    game = built_total(name, EXPORT_QUALITY)
+    print('%-12s hero %6d tris %6d verts, %s %6d tris %6d verts'
+          % (name, hero['triangles'], hero['vertices'], EXPORT_QUALITY, game['triangles'], game['vertices']))
+    return ['%s %s: %d > hero %d' % (EXPORT_QUALITY, stat, game[stat], hero[stat])
+            for stat in ('triangles', 'vertices', 'objects') if game[stat] > hero[stat]]
+
+
+def main():
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    parser = argparse.ArgumentParser(prog='quality_check.py')
+    parser.add_argument('assets', nargs='*', metavar='asset')
+    args = parser.parse_args(argv)
+    unknown = sorted(set(args.assets) - set(ASSETS))
+    if unknown:
+        parser.error('unknown asset(s): %s' % ', '.join(unknown))
+
+    failed = []
+    quality = common_utils.QUALITY
+    try:
+        for name in args.assets or list(ASSETS):
+            problems = check_keys(name) + check_spec(name) + check_baseline(name)
+            print('%-12s %s' % (name, 'ok' if not problems else 'FAIL'))
+            for problem in problems:
+                print('    ' + problem)
+            if problems:
+                failed.append(name)
+    finally:
+        common_utils.QUALITY = quality
+    common_utils.reset_scene()
+    if failed:
+        print('failed: %s' % ', '.join(failed))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,25 +1,43 @@
 import bpy
-import bmesh
 from mathutils import Vector
 import math
 
-# ========================================
-# PEMBERSIHAN SCENE
-# ========================================
-def clear_scene():
-    """Hapus semua objek, mesh, material, dan light di scene"""
-    bpy.ops.object.select_all(action='SELECT')
-    bpy.ops.object.delete(use_global=False)
-    
-    # Bersihkan data yang tidak terpakai
-    for mesh in bpy.data.meshes:
-        bpy.data.meshes.remove(mesh)
-    for material in bpy.data.materials:
-        bpy.data.materials.remove(material)
-    for light in bpy.data.lights:
-        bpy.data.lights.remove(light)
-
-clear_scene()
+# Import helpers
+try:
+    from common_utils import (
+        add_empty_at,
+        build_session,
+        build_batch,
+        add_cube,
+        add_cylinder,
+        add_cone,
+        add_uv_sphere,
+        shade_smooth,
+        add_subsurf,
+        assign_role_materials,
+        parent_parts,
+        from_library,
+        link_rig,
+    )
+except ModuleNotFoundError:
+    if "common_utils.py" in bpy.data.texts:
+        exec(bpy.data.texts["common_utils.py"].as_string(), globals())
+    else:
+        raise
+try:
+    from export_prep import export_asset
+except ModuleNotFoundError:
+    if "export_prep.py" in bpy.data.texts:
+        exec(bpy.data.texts["export_prep.py"].as_string(), globals())
+    else:
+        raise
+try:
+    from mesh_kernels import get_coords, set_coords, height_mask, axis_scale, radial_scale
+except ModuleNotFoundError:
+    if "mesh_kernels.py" in bpy.data.texts:
+        exec(bpy.data.texts["mesh_kernels.py"].as_string(), globals())
+    else:
+        raise
 
 # ========================================
 # FUNGSI UTILITAS
@@ -32,42 +50,34 @@ def create_material(name):
     nodes.clear()
     return mat
 
+def set_specular(bsdf, value):
+    """Set specular di Blender 3.x ('Specular') maupun 4.x ('Specular IOR Level')"""
+    if 'Specular IOR Level' in bsdf.inputs:
+        bsdf.inputs['Specular IOR Level'].default_value = value
+    else:
+        bsdf.inputs['Specular'].default_value = value
+
 def add_subdivision(obj, levels=2):
     """Tambahkan subdivision surface modifier"""
-    subsurf = obj.modifiers.new(name="Subdivision", type='SUBSURF')
-    subsurf.levels = levels
-    subsurf.render_levels = levels
-    return subsurf
+    # level dibatasi profil kualitas (common_utils.QUALITY)
+    return add_subsurf(obj, levels)
 
 def add_smooth(obj):
     """Aktifkan smooth shading"""
-    bpy.context.view_layer.objects.active = obj
-    bpy.ops.object.shade_smooth()
+    shade_smooth(obj)
 
 # ========================================
 # MODELING TUBUH
 # ========================================
 def create_body():
     """Buat mesh tubuh tuyul - silinder sederhana dengan perut sedikit buncit"""
-    bpy.ops.mesh.primitive_cylinder_add(radius=0.3, depth=0.8, location=(0, 0, 0.6))
-    body = bpy.context.active_object
-    body.name = "Tuyul_Body"
-    
-    # Edit mode untuk membuat perut sedikit buncit
-    bpy.ops.object.mode_set(mode='EDIT')
-    bpy.ops.mesh.select_all(action='SELECT')
-    
-    bm = bmesh.from_edit_mesh(body.data)
+    body = add_cylinder("Tuyul_Body", radius=0.3, depth=0.8, location=(0, 0, 0.6), role="skin")
     
-    # Scale sedikit untuk bentuk tubuh anak kecil
-    for v in bm.verts:
-        # Bagian tengah lebih besar (perut buncit)
-        if -0.1 < v.co.z < 0.2:
-            v.co.x *= 1.15
-            v.co.y *= 1.15
-    
-    bmesh.update_edit_mesh(body.data)
-    bpy.ops.object.mode_set(mode='OBJECT')
+    # Scale sedikit untuk bentuk tubuh anak kecil:
+    # bagian tengah lebih besar (perut buncit)
+    co = get_coords(body.data)
+    radial_scale(co, 1.15, mask=height_mask(co, -0.1, 0.2))
+    set_coords(body.data, co)
     
     # Smooth
     add_subdivision(body, levels=2)
@@ -77,22 +87,13 @@ def create_body():
 
 def create_head():
     """Buat kepala bulat besar khas tuyul dengan proporsi anak kecil"""
-    bpy.ops.mesh.primitive_uv_sphere_add(radius=0.5, location=(0, 0, 1.5))
-    head = bpy.context.active_object
-    head.name = "Tuyul_Head"
-    
-    bpy.ops.object.mode_set(mode='EDIT')
-    bpy.ops.mesh.select_all(action='SELECT')
-    
-    bm = bmesh.from_edit_mesh(head.data)
+    head = add_uv_sphere("Tuyul_Head", radius=0.5, location=(0, 0, 1.5), role="skin")
     
     # Bentuk kepala: sedikit oval
-    for v in bm.verts:
-        v.co.z *= 1.1  # Sedikit memanjang vertikal
-        v.co.y *= 0.95  # Sedikit pipih dari depan
-    
-    bmesh.update_edit_mesh(head.data)
-    bpy.ops.object.mode_set(mode='OBJECT')
+    # (sedikit pipih dari depan, sedikit memanjang vertikal)
+    co = get_coords(head.data)
+    axis_scale(co, (1.0, 0.95, 1.1))
+    set_coords(head.data, co)
     
     # Subdivision tinggi untuk smoothness
     add_subdivision(head, levels=3)
@@ -107,18 +108,16 @@ def create_eyes():
     
     for side in [-1, 1]:
         # Bola mata putih
-        bpy.ops.mesh.primitive_uv_sphere_add(radius=0.12, location=(side * 0.15, 0.35, 1.55))
-        eye = bpy.context.active_object
-        eye.name = f"Tuyul_Eye_{['L', 'R'][side > 0]}"
+        eye = add_uv_sphere(f"Tuyul_Eye_{['L', 'R'][side > 0]}", radius=0.12, location=(side * 0.15, 0.35, 1.55),
+                            role="eye_white")
         
         add_subdivision(eye, levels=2)
         add_smooth(eye)
         eyes.append(eye)
         
         # Pupil hitam
-        bpy.ops.mesh.primitive_uv_sphere_add(radius=0.06, location=(side * 0.15, 0.43, 1.55))
-        pupil = bpy.context.active_object
-        pupil.name = f"Tuyul_Pupil_{['L', 'R'][side > 0]}"
+        pupil = add_uv_sphere(f"Tuyul_Pupil_{['L', 'R'][side > 0]}", radius=0.06, location=(side * 0.15, 0.43, 1.55),
+                              role="pupil")
         
         add_subdivision(pupil, levels=2)
         add_smooth(pupil)
@@ -128,10 +127,8 @@ def create_eyes():
 
 def create_nose():
     """Buat hidung kecil bulat"""
-    bpy.ops.mesh.primitive_uv_sphere_add(radius=0.06, location=(0, 0.4, 1.35))
-    nose = bpy.context.active_object
-    nose.name = "Tuyul_Nose"
-    nose.scale = (0.7, 1, 0.8)
+    nose = add_uv_sphere("Tuyul_Nose", radius=0.06, location=(0, 0.4, 1.35), scale=(0.7, 1, 0.8),
+                         role="skin")
     
     add_subdivision(nose, levels=2)
     add_smooth(nose)
@@ -140,10 +137,8 @@ def create_nose():
 
 def create_mouth():
     """Buat mulut sederhana"""
-    bpy.ops.mesh.primitive_cube_add(size=0.2, location=(0, 0.37, 1.15))
-    mouth = bpy.context.active_object
-    mouth.name = "Tuyul_Mouth"
-    mouth.scale = (0.8, 0.5, 0.3)
+    mouth = add_cube("Tuyul_Mouth", size=0.2, location=(0, 0.37, 1.15), scale=(0.8, 0.5, 0.3),
+                     role="mouth")
     
     add_subdivision(mouth, levels=1)
     add_smooth(mouth)
@@ -156,14 +151,14 @@ def create_ears():
     
     for side in [-1, 1]:
         # Telinga runcing (cone)
-        bpy.ops.mesh.primitive_cone_add(
+        ear = add_cone(
+            f"Tuyul_Ear_{['L', 'R'][side > 0]}",
             radius1=0.1, 
             depth=0.25, 
-            location=(side * 0.45, 0, 1.7)
+            location=(side * 0.45, 0, 1.7),
+            rotation=(0, math.radians(30 * side), math.radians(-30 * side)),
+            role="ear"
         )
-        ear = bpy.context.active_object
-        ear.name = f"Tuyul_Ear_{['L', 'R'][side > 0]}"
-        ear.rotation_euler = (0, math.radians(30 * side), math.radians(-30 * side))
         
         add_subdivision(ear, levels=2)
         add_smooth(ear)
@@ -177,27 +172,27 @@ def create_arms():
     
     for side in [-1, 1]:
         # Lengan
-        bpy.ops.mesh.primitive_cylinder_add(
+        arm = add_cylinder(
+            f"Tuyul_Arm_{['L', 'R'][side > 0]}",
             radius=0.08, 
             depth=0.6, 
-            location=(side * 0.4, 0, 0.7)
+            location=(side * 0.4, 0, 0.7),
+            rotation=(0, 0, math.radians(10 * side)),
+            role="skin"
         )
-        arm = bpy.context.active_object
-        arm.name = f"Tuyul_Arm_{['L', 'R'][side > 0]}"
-        arm.rotation_euler = (0, 0, math.radians(10 * side))
         
         add_subdivision(arm, levels=2)
         add_smooth(arm)
         arms.append(arm)
         
         # Tangan
-        bpy.ops.mesh.primitive_uv_sphere_add(
+        hand = add_uv_sphere(
+            f"Tuyul_Hand_{['L', 'R'][side > 0]}",
             radius=0.1, 
-            location=(side * 0.45, 0, 0.35)
+            location=(side * 0.45, 0, 0.35),
+            scale=(1, 1.2, 0.8),
+            role="skin"
         )
-        hand = bpy.context.active_object
-        hand.name = f"Tuyul_Hand_{['L', 'R'][side > 0]}"
-        hand.scale = (1, 1.2, 0.8)
         
         add_subdivision(hand, levels=2)
         add_smooth(hand)
@@ -211,13 +206,13 @@ def create_legs():
     
     for side in [-1, 1]:
         # Kaki
-        bpy.ops.mesh.primitive_cylinder_add(
+        leg = add_cylinder(
+            f"Tuyul_Leg_{['L', 'R'][side > 0]}",
             radius=0.1, 
             depth=0.4, 
-            location=(side * 0.12, 0, 0)
+            location=(side * 0.12, 0, 0),
+            role="skin"
         )
-        leg = bpy.context.active_object
-        leg.name = f"Tuyul_Leg_{['L', 'R'][side > 0]}"
         
         add_subdivision(leg, levels=2)
         add_smooth(leg)
@@ -227,10 +222,7 @@ def create_legs():
 
 def create_pants():
     """Buat celana pendek sederhana"""
-    bpy.ops.mesh.primitive_cube_add(size=0.5, location=(0, 0, 0.15))
-    pants = bpy.context.active_object
-    pants.name = "Tuyul_Pants"
-    pants.scale = (0.7, 0.7, 0.3)
+    pants = add_cube("Tuyul_Pants", size=0.5, location=(0, 0, 0.15), scale=(0.7, 0.7, 0.3), role="pants")
     
     add_subdivision(pants, levels=1)
     add_smooth(pants)
@@ -255,8 +247,13 @@ def create_skin_material():
     bsdf.location = (200, 0)
     bsdf.inputs['Base Color'].default_value = (0.85, 0.82, 0.78, 1)  # Kulit pucat
     bsdf.inputs['Roughness'].default_value = 0.6
-    bsdf.inputs['Subsurface'].default_value = 0.05
-    bsdf.inputs['Subsurface Color'].default_value = (0.9, 0.7, 0.6, 1)
+    # Cek versi Blender untuk subsurface (Blender 4.x tidak punya 'Subsurface Color')
+    if 'Subsurface Weight' in bsdf.inputs:
+        bsdf.inputs['Subsurface Weight'].default_value = 0.05
+    elif 'Subsurface' in bsdf.inputs:
+        bsdf.inputs['Subsurface'].default_value = 0.05
+    if 'Subsurface Color' in bsdf.inputs:
+        bsdf.inputs['Subsurface Color'].default_value = (0.9, 0.7, 0.6, 1)
     
     links.new(bsdf.outputs['BSDF'], output.inputs['Surface'])
     
@@ -275,7 +272,7 @@ def create_eye_white_material():
     bsdf.location = (0, 0)
     bsdf.inputs['Base Color'].default_value = (1, 1, 1, 1)
     bsdf.inputs['Roughness'].default_value = 0.1
-    bsdf.inputs['Specular'].default_value = 0.5
+    set_specular(bsdf, 0.5)
     
     links.new(bsdf.outputs['BSDF'], output.inputs['Surface'])
     
@@ -294,7 +291,7 @@ def create_pupil_material():
     bsdf.location = (0, 0)
     bsdf.inputs['Base Color'].default_value = (0.05, 0.05, 0.05, 1)
     bsdf.inputs['Roughness'].default_value = 0.2
-    bsdf.inputs['Specular'].default_value = 0.8
+    set_specular(bsdf, 0.8)
     
     links.new(bsdf.outputs['BSDF'], output.inputs['Surface'])
     
@@ -354,60 +351,17 @@ def create_ear_material():
     
     return mat
 
-def apply_materials(body, head, eyes, pupils, nose, mouth, ears, arms, legs, pants):
-    """Aplikasikan material ke semua objek"""
-    skin_mat = create_skin_material()
-    eye_white_mat = create_eye_white_material()
-    pupil_mat = create_pupil_material()
-    mouth_mat = create_mouth_material()
-    pants_mat = create_pants_material()
-    ear_mat = create_ear_material()
-    
-    # Kulit
-    for obj in [head, nose] + arms + legs:
-        if obj.data.materials:
-            obj.data.materials[0] = skin_mat
-        else:
-            obj.data.materials.append(skin_mat)
-    
-    # Mata putih
-    for eye in eyes:
-        if eye.data.materials:
-            eye.data.materials[0] = eye_white_mat
-        else:
-            eye.data.materials.append(eye_white_mat)
-    
-    # Pupil hitam
-    for pupil in pupils:
-        if pupil.data.materials:
-            pupil.data.materials[0] = pupil_mat
-        else:
-            pupil.data.materials.append(pupil_mat)
-    
-    # Mulut
-    if mouth.data.materials:
-        mouth.data.materials[0] = mouth_mat
-    else:
-        mouth.data.materials.append(mouth_mat)
-    
-    # Celana
-    if pants.data.materials:
-        pants.data.materials[0] = pants_mat
-    else:
-        pants.data.materials.append(pants_mat)
-    
-    # Telinga
-    for ear in ears:
-        if ear.data.materials:
-            ear.data.materials[0] = ear_mat
-        else:
-            ear.data.materials.append(ear_mat)
-    
-    # Tubuh (kulit juga)
-    if body.data.materials:
-        body.data.materials[0] = skin_mat
-    else:
-        body.data.materials.append(skin_mat)
+def apply_materials():
+    """Aplikasikan material ke semua part Tuyul sesuai role-nya"""
+    # Pakai material dari library.blend kalau ada, kalau tidak dibuat di sini
+    assign_role_materials("Tuyul", {
+        "skin": from_library('materials', "Tuyul_Skin") or create_skin_material(),
+        "eye_white": from_library('materials', "Tuyul_Eye_White") or create_eye_white_material(),
+        "pupil": from_library('materials', "Tuyul_Pupil") or create_pupil_material(),
+        "mouth": from_library('materials', "Tuyul_Mouth") or create_mouth_material(),
+        "pants": from_library('materials', "Tuyul_Pants") or create_pants_material(),
+        "ear": from_library('materials', "Tuyul_Ear") or create_ear_material(),
+    })
 
 # ========================================
 # LIGHTING & ATMOSFER
@@ -479,51 +433,67 @@ def create_tuyul():
     """Fungsi utama untuk membuat seluruh model tuyul"""
     print("Membuat model Tuyul stylized...")
     
-    # Modeling
-    print("- Membuat tubuh...")
-    body = create_body()
+    # Semua part dibangun di collection yang belum di-link ke scene,
+    # scene di-update sekali saja setelah blok ini selesai
+    with build_batch("Tuyul"):
+        # Modeling
+        print("- Membuat tubuh...")
+        body = create_body()
     
-    print("- Membuat kepala...")
-    head = create_head()
+        print("- Membuat kepala...")
+        head = create_head()
     
-    print("- Membuat mata...")
-    eyes, pupils = create_eyes()
+        print("- Membuat mata...")
+        eyes, pupils = create_eyes()
     
-    print("- Membuat hidung...")
-    nose = create_nose()
+        print("- Membuat hidung...")
+        nose = create_nose()
     
-    print("- Membuat mulut...")
-    mouth = create_mouth()
+        print("- Membuat mulut...")
+        mouth = create_mouth()
     
-    print("- Membuat telinga...")
-    ears = create_ears()
+        print("- Membuat telinga...")
+        ears = create_ears()
     
-    print("- Membuat lengan...")
-    arms = create_arms()
+        print("- Membuat lengan...")
+        arms = create_arms()
     
-    print("- Membuat kaki...")
-    legs = create_legs()
+        print("- Membuat kaki...")
+        legs = create_legs()
     
-    print("- Membuat celana...")
-    pants = create_pants()
+        print("- Membuat celana...")
+        pants = create_pants()
     
-    # Material
-    print("- Menerapkan material...")
-    apply_materials(body, head, eyes, pupils, nose, mouth, ears, arms, legs, pants)
+        # Material
+        print("- Menerapkan material...")
+        apply_materials()
     
-    # Lighting
-    print("- Setup lighting...")
-    setup_lighting()
+        # Root untuk pivot di Roblox
+        root = add_empty_at("TuyulRoot", (0, 0, 0))
+        parent_parts("Tuyul", root)
     
-    # Camera & Render
-    print("- Setup camera...")
-    setup_camera()
+    # Lighting & camera: rig studio dari library.blend, atau dibuat ulang kalau belum ada
+    print("- Setup lighting & camera...")
+    if not link_rig("Rig_Tuyul"):
+        setup_lighting()
+        setup_camera()
     
+    # Render
     print("- Konfigurasi render settings...")
     setup_render_settings()
     
     print("Model Tuyul selesai dibuat!")
     print("Tekan F12 untuk render atau gunakan Viewport Shading (Z > Rendered)")
+    
+    return root
+
+def main(filepath_fbx=None, **export_options):
+    # build_session() menghapus semua data dari build sebelumnya (mesh, material, light, kamera)
+    with build_session():
+        create_tuyul()
+        if filepath_fbx:
+            export_asset(filepath_fbx, kind="enemy", **export_options)
 
 # Jalankan fungsi utama
-create_tuyul()
\ No newline at end of file
+if __name__ == "__main__":
+    main(filepath_fbx=None)
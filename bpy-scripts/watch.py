@@ -0,0 +1,102 @@
+# Watch mode: rebuild and re-export only the assets affected by a saved script
+# Run with a normal Python interpreter (not inside Blender):
+#   python bpy-scripts/watch.py                # watch the whole roster
+#   python bpy-scripts/watch.py tuyul payung   # only these assets
+# Builds run in one persistent Blender process (build_worker.py --serve), so a save
+# costs the build + export time only. Saving common_utils.py rebuilds every asset
+# that imports it, saving specs/<asset>.json rebuilds that asset; outputs of
+# unaffected assets are left untouched.
+import argparse
+import glob
+import os
+import sys
+import time
+
+from assets import ASSETS, ASSET_DIR, EXPORT_PRESETS, EXPORT_QUALITY, SCRIPTS_DIR, fbx_path
+from build_cache import build_key, is_fresh, record_key, sources
+from build_client import BuildServer, format_reply
+
+
+def snapshot():
+    """{path: mtime} for every script, spec, budgets.json and library.blend in bpy-scripts/."""
+    stamps = {}
+    paths = (glob.glob(os.path.join(SCRIPTS_DIR, '*.py')) + glob.glob(os.path.join(SCRIPTS_DIR, 'specs', '*.json'))
+             + glob.glob(os.path.join(SCRIPTS_DIR, '*.json')) + glob.glob(os.path.join(SCRIPTS_DIR, '*.blend')))
+    for path in paths:
+        try:
+            stamps[path] = os.path.getmtime(path)
+        except OSError:
+            pass
+    return stamps
+
+
+def affected_assets(changed, names):
+    affected = []
+    for name in names:
+        # a script saved half-written does not parse yet; the next save picks it up again
+        try:
+            if set(sources(name)) & set(changed):
+                affected.append(name)
+        except (SyntaxError, OSError) as exc:
+            print('%s skipped: %s: %s' % (name, type(exc).__name__, exc))
+    return affected
+
+
+def rebuild(server, names, out_dir):
+    for name in names:
+        filepath_fbx = fbx_path(name, out_dir)
+        # the plain export keeps a save-to-FBX round trip short; build_all.py makes the release
+        options = {'quality': EXPORT_QUALITY, 'export': EXPORT_PRESETS['plain']}
+        try:
+            key = build_key(name, server.blender_version, options)
+            if is_fresh(filepath_fbx, key):
+                # saved without a content change
+                continue
+            reply = server.build(name, filepath_fbx)
+        except (SyntaxError, OSError, RuntimeError) as exc:
+            print('%s FAILED: %s: %s' % (name, type(exc).__name__, exc))
+            continue
+        print(format_reply(reply))
+        if reply['ok']:
+            record_key(filepath_fbx, name, key)
+
+
+def watch(names, blender='blender', out_dir=None, interval=0.2):
+    out_dir = out_dir or ASSET_DIR
+    os.makedirs(out_dir, exist_ok=True)
+    with BuildServer(blender) as server:
+        print('Blender %s ready, watching %s' % (server.blender_version, SCRIPTS_DIR))
+        # bring stale outputs up to date once, then react to saves
+        rebuild(server, names, out_dir)
+        stamps = snapshot()
+        while True:
+            time.sleep(interval)
+            current = snapshot()
+            changed = [path for path, mtime in current.items() if stamps.get(path) != mtime]
+            stamps = current
+            if not changed:
+                continue
+            print('changed: %s' % ', '.join(os.path.basename(p) for p in changed))
+            rebuild(server, affected_assets(changed, names), out_dir)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Rebuild assets when their scripts are saved.')
+    parser.add_argument('assets', nargs='*', metavar='asset',
+                        help='assets to watch (default: all of %s)' % ', '.join(sorted(ASSETS)))
+    parser.add_argument('--blender', default=os.environ.get('BLENDER', 'blender'))
+    parser.add_argument('-o', '--out', default=ASSET_DIR, help='output directory (default: Asset1/)')
+    parser.add_argument('--interval', type=float, default=0.2, help='polling interval in seconds')
+    args = parser.parse_args(argv)
+    unknown = sorted(set(args.assets) - set(ASSETS))
+    if unknown:
+        parser.error('unknown asset(s): %s' % ', '.join(unknown))
+    try:
+        watch(args.assets or list(ASSETS), args.blender, args.out, args.interval)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())